@@ -1,126 +1,91 @@
 import streamlit as st
 import pandas as pd
-from fuzzywuzzy import fuzz
-import openai
 import json
-import re
-from dotenv import load_dotenv
 import os
+import logging
+import requests
+import tracing
+from tracing import span
 
-# Load environment variables
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    st.error("OPENAI_API_KEY not found in .env file. Please add it to enable LLM search.")
-    st.stop()
+# The search itself runs in search_service.py; this app only renders its results
+SEARCH_SERVICE_URL = os.getenv("SEARCH_SERVICE_URL", "http://127.0.0.1:8502").rstrip("/")
+SERVICE_TIMEOUT = float(os.getenv("SERVICE_TIMEOUT", "10"))
+# The service stops waiting for AI results after its LLM_DEADLINE; allow for that plus the local search
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "15"))
+# The app's own rendering spans; the service rotates TRACE_LOG_PATH from another process
+APP_TRACE_LOG_PATH = os.getenv("APP_TRACE_LOG_PATH", "trace.app.jsonl")
 
-# Initialize OpenAI client
-client = openai.OpenAI(api_key=OPENAI_API_KEY)
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+tracing.configure(APP_TRACE_LOG_PATH)
 
-# Load resources
-@st.cache_data
-def load_data():
-    try:
-        df = pd.read_csv("resources.csv")
-        # Removed the line that displayed the database count
-        return df
-    except FileNotFoundError:
-        st.error("resources.csv not found. Please run generate_data.py first.")
-        return pd.DataFrame()
-
-# Current algorithm: Fuzzy matching
-def search_resources(df, zip_code, needs, insurance, language, gender):
-    results = []
-    for _, row in df.iterrows():
-        zip_match = str(row['ZIP_Code']).strip() == str(zip_code).strip()
-        needs_match = fuzz.partial_ratio(needs.lower(), row['Services'].lower()) > 80
-        insurance_match = insurance.lower() in row['Eligibility'].lower() or 'all' in row['Eligibility'].lower()
-        language_match = language.lower() in row['Languages'].lower() or 'all' in row['Languages'].lower()
-        gender_match = gender.lower() in row['Gender'].lower() or 'all' in row['Gender'].lower()
-        
-        if zip_match and needs_match and insurance_match and language_match and gender_match:
-            results.append(row)
-    
-    return pd.DataFrame(results)
+# Resources shown per page of results
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "10"))
 
-# LLM-based search with OpenAI
-def search_resources_llm(zip_code, needs, insurance, language, gender):
-    df = load_data()
-    if df.empty:
-        return pd.DataFrame(), "No resources available due to missing dataset."
-    
-    prompt = f"""
-    You are a health resource navigator for uninsured patients in Austin, TX.
-    Given the following patient inputs:
-    - ZIP Code: {zip_code}
-    - Medical Needs: {needs}
-    - Insurance Status: {insurance}
-    - Preferred Language: {language}
-    - Gender-Specific Services: {gender}
-    
-    Filter the following resources (in CSV format) to find matching clinics. If no matches are found, generate up to 3 plausible resources in Austin, TX, that fit the criteria, ensuring realistic details (e.g., addresses in Austin, valid ZIP codes like 78701, 78702).
-    
-    Your response MUST be ONLY valid JSON in the exact format specified below, with no additional text, explanations, or markdown formatting.
-    
-    Resources:
-    {df.to_csv(index=False)}
-    
-    REQUIRED OUTPUT FORMAT:
-    {{
-        "resources": [
-            {{
-                "Resource_Name": "...",
-                "Address": "...",
-                "Services": "...",
-                "Eligibility": "...",
-                "Hours": "...",
-                "Contact": "...",
-                "ZIP_Code": "...",
-                "Languages": "...",
-                "Gender": "..."
-            }}
-        ],
-        "recommendation": "..." 
-    }}
-    
-    The recommendation should be 50-100 words suggesting next steps or considerations for the patient.
+# Search area options: (radius in miles, number of nearest resources)
+SEARCH_AREAS = {
+    "This ZIP only": (None, None),
+    "Within 5 miles": (5, None),
+    "Within 10 miles": (10, None),
+    "Within 25 miles": (25, None),
+    "5 nearest": (None, 5),
+}
+
+# Opening hours options: (open now, day the resource must be open on)
+OPEN_HOURS = {"Any time": (False, None), "Open now": (True, None)}
+OPEN_HOURS.update({f"Open on {day}": (False, day.lower()) for day in
+                   ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]})
+
+@st.cache_resource
+def service_session():
+    """Keep-alive HTTP session to the search service, shared by all sessions in this process."""
+    return requests.Session()
+
+def service_get(path):
+    response = service_session().get(f"{SEARCH_SERVICE_URL}{path}", timeout=SERVICE_TIMEOUT)
+    response.raise_for_status()
+    return response
+
+def search_resources(query):
+    """Fuzzy search through the service; returns its ranked page of results and the total match count."""
+    response = service_session().post(f"{SEARCH_SERVICE_URL}/search", json=query, timeout=SERVICE_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def search_resources_llm(query):
+    """Yield the service's AI search events as they arrive.
+
+    The first event holds the local matches ("local"), then each streamed
+    resource ("resource"), then the full reply ("resources" and
+    "recommendation") or an "error".
     """
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",  # Use "gpt-4" if available in your plan
-            messages=[
-                {"role": "system", "content": "You are a healthcare resource navigator assistant that returns only valid JSON. Your responses must contain nothing but properly formatted JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-            max_tokens=2500,
-            temperature=0.5
-        )
-        output = response.choices[0].message.content
-        
-        # Log raw output for debugging
-        with open("llm_response_log.txt", "w") as log_file:
-            log_file.write(f"Raw response:\n{output}")
-        
-        # Clean the output to ensure it's valid JSON
-        # Remove any markdown code block indicators
-        clean_output = re.sub(r'```json|```', '', output).strip()
-        
-        # Parse the JSON
-        parsed = json.loads(clean_output)
-        
-        resources = parsed.get("resources", [])
-        recommendation = parsed.get("recommendation", "No recommendation provided.")
-        
-        # Convert to DataFrame
-        return pd.DataFrame(resources), recommendation
-    except Exception as e:
-        st.error(f"LLM search failed: {str(e)}. Using current algorithm as fallback.")
-        # Log the error and output for debugging
-        with open("llm_error_log.txt", "w") as log_file:
-            log_file.write(f"Error: {str(e)}\n\nOutput (if available):\n{locals().get('output', 'No output')}")
-        return search_resources(df, zip_code, needs, insurance, language, gender), "LLM unavailable; used fuzzy matching."
+    with service_session().post(f"{SEARCH_SERVICE_URL}/search/llm", json=query, stream=True,
+                                timeout=(SERVICE_TIMEOUT, LLM_DEADLINE + SERVICE_TIMEOUT)) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+def resource_card(resource):
+    """Markdown card for one resource dict (a search result or a resource from the LLM)."""
+    lines = [f"**{resource.get('Resource_Name') or ''}**", f"Address: {resource.get('Address') or ''}"]
+    if resource.get('Distance_Miles') is not None:
+        lines.append(f"Distance: {resource['Distance_Miles']} miles")
+    for field in ('Services', 'Eligibility', 'Hours', 'Contact', 'Languages', 'Gender'):
+        lines.append(f"{field}: {resource.get(field) or ''}")
+    return "  \n".join(lines)
+
+def render_resources(resources):
+    """Display a batch of resources as one markdown element, however many there are."""
+    if resources:
+        st.markdown("\n\n---\n\n".join(resource_card(resource) for resource in resources) + "\n\n---")
+
+def change_page(step):
+    st.session_state.page += step
 
 # Improved scraping for generate_data.py (this doesn't change app.py functionality)
 # You would need to make these changes in generate_data.py separately
@@ -132,6 +97,13 @@ st.write("Find healthcare resources for uninsured patients in Austin, TX")
 # Sidebar
 st.sidebar.header("About")
 st.sidebar.write("This app helps uninsured patients find community health resources in Austin, TX, tailored to their ZIP code, medical needs, insurance status, language, and gender-specific services. Powered by fuzzy matching and OpenAI LLM for advanced search and insights.")
+try:
+    service_stats = service_get("/stats").json()
+except requests.RequestException as e:
+    st.error(f"Search service unavailable at {SEARCH_SERVICE_URL} ({str(e)}). Start it with `python search_service.py`.")
+    st.stop()
+cache_stats = service_stats["cache"]
+st.sidebar.caption(f"AI search cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['coalesced']} shared, {cache_stats['entries']} stored")
 
 # Input form
 with st.form("search_form"):
@@ -140,6 +112,9 @@ with st.form("search_form"):
     insurance = st.selectbox("Insurance Status", ["Uninsured", "Medicaid", "Low-income", "All"])
     language = st.selectbox("Preferred Language", ["English", "Spanish", "Other", "All"])
     gender = st.selectbox("Gender-Specific Services", ["All", "Female-only", "Male-only"])
+    search_area = st.selectbox("Search Area", list(SEARCH_AREAS))
+    open_hours = st.selectbox("Opening Hours", list(OPEN_HOURS), help="Resources with unknown hours are left out of open-hours searches")
+    open_after = st.text_input("Open After", placeholder="e.g., 5PM (with a day)")
     
     col1, col2 = st.columns(2)
     with col1:
@@ -147,36 +122,106 @@ with st.form("search_form"):
     with col2:
         llm_button = st.form_submit_button("AI-Powered Search")
 
-# Load data
-df = load_data()
-
 # Process search
+radius_miles, nearest = SEARCH_AREAS[search_area]
+open_now, open_day = OPEN_HOURS[open_hours]
+query = {"zip_code": zip_code, "needs": needs, "insurance": insurance, "language": language, "gender": gender,
+         "radius_miles": radius_miles, "k": nearest, "limit": PAGE_SIZE,
+         "open_now": open_now, "open_day": open_day, "open_after": open_after if open_day else None}
+recommendation = ""
 if current_button and zip_code and needs:
-    results = search_resources(df, zip_code, needs, insurance, language, gender)
+    # Page buttons rerun the script without a form submit, so the search is kept in the session
+    st.session_state.fuzzy_query = query
+    st.session_state.page = 0
+elif llm_button:
+    st.session_state.fuzzy_query = None
+
+if st.session_state.get("fuzzy_query") and not llm_button:
+    page = st.session_state.page
+    try:
+        result = search_resources({**st.session_state.fuzzy_query, "offset": page * PAGE_SIZE})
+    except requests.RequestException as e:
+        st.error(f"Search failed: {str(e)}")
+        result = {"total": 0, "results": []}
     recommendation = "Results based on fuzzy matching algorithm."
+    if result["total"]:
+        st.subheader("Matching Resources")
+        with span("render", rows=len(result["results"])):
+            render_resources(result["results"])
+        pages = -(-result["total"] // PAGE_SIZE)
+        col1, col2, col3 = st.columns([1, 3, 1])
+        with col1:
+            st.button("Previous", on_click=change_page, args=(-1,), disabled=page == 0)
+        with col2:
+            st.caption(f"Page {page + 1} of {pages} ({result['total']} matches, best first)")
+        with col3:
+            st.button("Next", on_click=change_page, args=(1,), disabled=page + 1 >= pages)
+    else:
+        st.warning("No matching resources found. Try adjusting your inputs.")
 elif llm_button and zip_code and needs:
-    results, recommendation = search_resources_llm(zip_code, needs, insurance, language, gender)
-else:
-    results = pd.DataFrame()
-    recommendation = ""
-
-# Display results
-if not results.empty:
-    st.subheader("Matching Resources")
-    for _, row in results.iterrows():
-        st.write(f"**{row['Resource_Name']}**")
-        st.write(f"Address: {row['Address']}")
-        st.write(f"Services: {row['Services']}")
-        st.write(f"Eligibility: {row['Eligibility']}")
-        st.write(f"Hours: {row['Hours']}")
-        st.write(f"Contact: {row['Contact']}")
-        st.write(f"Languages: {row['Languages']}")
-        st.write(f"Gender: {row['Gender']}")
-        st.write("---")
+    # The service starts the LLM call alongside the local search and sends the local results first
+    ai_results = None
+    streamed = []
+    error = None
+    local_shown = False
+    with st.spinner("Waiting for AI-powered results..."):
+        try:
+            for item in search_resources_llm(query):
+                if "local" in item:
+                    local_results = item["local"]["results"]
+                    if local_results:
+                        st.subheader("Matching Resources")
+                        with span("render", rows=len(local_results)):
+                            render_resources(local_results)
+                        local_shown = True
+                        if item["local"]["total"] > len(local_results):
+                            st.caption(f"Top {len(local_results)} of {item['local']['total']} local matches; use Traditional Search to page through them.")
+                    else:
+                        st.warning("No local matches found. Waiting for AI-powered results...")
+                    st.subheader("AI-Recommended Resources")
+                    ai_results = st.container()
+                elif "resource" in item:
+                    with span("render", rows=1), ai_results:
+                        render_resources([item["resource"]])
+                    streamed.append(item["resource"])
+                elif "error" in item:
+                    error = item["error"]
+                else:
+                    # Cached or shared replies arrive whole instead of streaming
+                    remaining = item["resources"][len(streamed):]
+                    with span("render", rows=len(remaining)), ai_results:
+                        render_resources(remaining)
+                    if not item["resources"]:
+                        st.warning("No AI-recommended resources found. Try adjusting your inputs.")
+                    recommendation = item["recommendation"]
+        except requests.RequestException as e:
+            error = str(e)
+    if error and local_shown:
+        st.error(f"LLM search failed: {error}. Using current algorithm as fallback.")
+        st.info("AI-powered results are unavailable; showing local matches only.")
+        recommendation = "LLM unavailable; used fuzzy matching."
+    elif error:
+        st.error(f"LLM search failed: {error}.")
+        recommendation = "LLM unavailable and no local matches to show; try Traditional Search or adjust your inputs."
 else:
     st.warning("No matching resources found. Try adjusting your inputs.")
 
 # Display recommendation
 if recommendation:
     st.subheader("Recommendation")
-    st.write(recommendation)
\ No newline at end of file
+    st.write(recommendation)
+
+# Optional per-stage timing panel: search stages from the service, rendering from this process
+if st.sidebar.checkbox("Show stage timings"):
+    try:
+        summary = {**service_get("/stats").json()["stages"], **tracing.stage_summary()}
+        metrics = service_get("/metrics").text
+    except requests.RequestException as e:
+        st.sidebar.caption(f"Search service unavailable: {str(e)}")
+        summary, metrics = {}, ""
+    if summary:
+        st.sidebar.dataframe(pd.DataFrame.from_dict(summary, orient="index"))
+        with st.sidebar.expander("Prometheus metrics"):
+            st.code(metrics, language="text")
+    else:
+        st.sidebar.caption("No stages recorded yet.")
\ No newline at end of file
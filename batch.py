@@ -0,0 +1,137 @@
+"""Batch triage: run the fuzzy resource search over a file of patient queries.
+
+Reads a CSV or JSONL file with zip_code, needs and optionally insurance,
+language, gender, radius_miles, k, limit, offset, open_now, open_day,
+open_after and id columns, and writes one JSON line per query with its
+matching resources, best first. A query that cannot be run (a malformed
+number, day or time) gets {"id": ..., "error": ...} instead, and the rest
+of the batch carries on. Runs without the Streamlit UI:
+
+    python batch.py queries.csv -o results.jsonl --workers 4
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from search import run_query
+from snapshot import open_matcher
+
+logger = logging.getLogger(__name__)
+
+# Matcher shared by every query handled in this process
+_matcher = None
+
+
+def read_queries(path):
+    """Yield query dicts from a CSV or JSONL file.
+
+    JSONL lines that are not valid JSON are yielded as their text, so they
+    are reported as failed queries instead of ending the run.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith(('.jsonl', '.json')):
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        yield line.strip()
+        else:
+            yield from csv.DictReader(f)
+
+
+def _load_matcher(dataset_path):
+    global _matcher
+    if _matcher is None:
+        _matcher = open_matcher(dataset_path)
+    return _matcher
+
+
+def _run_one(matcher, query):
+    """Result dict for one query, or {"id", "error"} when the query is malformed."""
+    if not isinstance(query, dict):
+        return {'id': None, 'error': f"expected a JSON object, got {query!r}"}
+    try:
+        return run_query(matcher, query)
+    except (ValueError, TypeError) as e:
+        return {'id': query.get('id'), 'error': str(e)}
+
+
+def _run_batch(dataset_path, queries):
+    matcher = _load_matcher(dataset_path)
+    return [_run_one(matcher, query) for query in queries]
+
+
+def _batches(queries, batch_size):
+    batch = []
+    for query in queries:
+        batch.append(query)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def triage(queries, dataset_path="resources.csv", workers=None, batch_size=100):
+    """Yield one result dict per query, in input order.
+
+    Malformed queries yield {"id": ..., "error": "<message>"} without
+    stopping the others.
+
+    The dataset is loaded and indexed once, before the worker processes
+    start, so forked workers share it; other start methods load it once per
+    worker (from the memory-mapped snapshot when one is current). At most
+    two batches per worker are in flight at a time, so arbitrarily long
+    inputs stream through in bounded memory.
+    """
+    workers = workers or os.cpu_count() or 1
+    _load_matcher(dataset_path)
+    if workers == 1:
+        for batch in _batches(queries, batch_size):
+            yield from _run_batch(dataset_path, batch)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in _batches(queries, batch_size):
+            pending.append(pool.submit(_run_batch, dataset_path, batch))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run resource searches for a file of patient queries.")
+    parser.add_argument("queries", help="CSV or JSONL file of patient queries")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("--dataset", default="resources.csv", help="resources CSV to search (its .snapshot is used when current)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=100, help="queries per work item")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    start = time.perf_counter()
+    count = failed = 0
+    try:
+        for result in triage(read_queries(args.queries), args.dataset, args.workers, args.batch_size):
+            out.write(json.dumps(result) + '\n')
+            count += 1
+            failed += 'error' in result
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    logger.info(f"Processed {count} queries in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.1f} queries/s), {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
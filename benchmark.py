@@ -0,0 +1,559 @@
+"""Offline performance benchmarks for the resource navigator.
+
+    python benchmark.py suite --sizes 1000,10000,100000 --output benchmark_results.json
+    python benchmark.py filters --rows 1000000
+    python benchmark.py scrapers --fixtures fixtures
+
+The suite runs offline (the LLM client is stubbed), writes its results as
+JSON and exits with status 1 when a metric regresses beyond the threshold
+relative to the stored baseline.
+"""
+import argparse
+import functools
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+import scrapers
+from bitsets import set_rows
+from geo import load_zip_centroids
+from matcher import ResourceMatcher, search_resources
+from prompting import PROMPT_COLUMNS
+from search import SEARCH_FIELDS, ask_llm, build_llm_prompt
+from snapshot import open_matcher, snapshot_path_for, write_snapshot
+
+BASELINE_PATH = "benchmark_baseline.json"
+REGRESSION_THRESHOLD = 0.3
+# Parse rates come from a few milliseconds of work per page and swing more between runs than the search timings
+RATE_THRESHOLD = 0.5
+# Differences below these are run-to-run noise on a shared machine rather than regressions
+NOISE_FLOOR = {'_ms': 5.0, '_s': 0.25}
+
+# Same defaults as the service's LLM_TOP_K and LLM_TOKEN_BUDGET
+LLM_TOP_K = 25
+LLM_TOKEN_BUDGET = 3000
+LLM_QUERIES = 50
+# Same default as the app's PAGE_SIZE
+RANKED_PAGE_SIZE = 10
+
+QUERY_NEEDS = ['primary care', 'dental', 'mental health', 'counseling', 'pediatrics', 'womens health', 'dentist',
+               'health screenings', 'substance abuse', 'immunizations', 'primery care', 'doctor for kids',
+               'vision care', 'specialty care', 'dental, mental health']
+# (radius in miles, nearest k) in the proportions of the app's search areas
+QUERY_AREAS = [(None, None), (None, None), (5, None), (10, None), (None, 5)]
+
+FILTER_QUERIES = [
+    (insurance, language, gender)
+    for insurance in ["Uninsured", "Medicaid", "Low-income", "All"]
+    for language in ["English", "Spanish", "Other", "All"]
+    for gender in ["All", "Female-only", "Male-only"]
+]
+
+
+NAME_PREFIXES = ['Eastside', 'Westside', 'North Austin', 'South Austin', 'Riverside', 'Travis County', 'Capital City',
+                 'Lone Star', 'Hill Country', 'Central Texas', 'Hope', 'Grace', 'Open Door', 'El Buen', 'Casa de']
+NAME_CORES = ['Community', 'Family', 'Neighborhood', 'People’s', 'Volunteer', 'Free', 'Faith', 'Youth', 'Women’s', 'Senior']
+NAME_SUFFIXES = ['Clinic', 'Health Center', 'Medical Clinic', 'Care Center', 'Health Services', 'Wellness Center', 'Dental Clinic']
+EXTRA_SERVICES = ['Vision care', 'Prenatal care', 'Immunizations', 'HIV testing', 'Nutrition counseling', 'Physical therapy',
+                  'Psychiatry', 'Addiction recovery', 'Pediatric dental', 'Diabetes education']
+EXTRA_ELIGIBILITY = ['CHIP', 'Medicare', 'veterans', 'students', 'MAP members', 'under 200% FPL']
+OTHER_LANGUAGES = ['Vietnamese', 'Chinese', 'Arabic', 'Korean', 'Hindi', 'ASL']
+HOURS = ['M-F 8AM-5PM', 'Contact for hours', 'Th 6PM-9PM', 'M-Th 9AM-6PM', 'M-F 7:30AM-4:30PM', 'Sa 9AM-1PM',
+         'Tu, Th 5PM-8PM', 'M-F 8AM-5PM, Sa 9AM-12PM', '24/7', 'W 1PM-5PM', 'By appointment']
+EXTRA_STREETS = ['Airport Blvd', 'Burnet Rd', 'S Congress Ave', 'E Riverside Dr', 'N Lamar Blvd', 'Cameron Rd',
+                 'Manor Rd', 'W William Cannon Dr', 'E Parmer Ln', 'Rundberg Ln', 'Slaughter Ln', 'Springdale Rd']
+
+
+def _zipf_weights(count, exponent=1.1):
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _value_pool(rng, items, size, min_items, max_items, seed_values=()):
+    """Distinct comma-separated combinations of items, with the template values first."""
+    pool = list(dict.fromkeys(seed_values))
+    seen = set(pool)
+    for _ in range(size * 10):
+        if len(pool) >= size:
+            break
+        count = int(rng.integers(min_items, max_items + 1))
+        value = ', '.join(rng.choice(items, size=min(count, len(items)), replace=False))
+        if value not in seen:
+            seen.add(value)
+            pool.append(value)
+    return np.array(pool, dtype=object)
+
+
+def synthetic_resources(rows, seed=0, template_path="resources.csv"):
+    """Realistic synthetic dataset following the resources.csv schema.
+
+    Services, eligibility and languages are combinations of the template
+    dataset's vocabulary plus common extras, drawn from pools of distinct
+    values with a skewed (Zipf) frequency, as in real directories where a
+    few combinations dominate. ZIPs come from the bundled centroid table;
+    names, addresses and phones are generated so every row is distinct.
+    """
+    rng = np.random.default_rng(seed)
+    template = pd.read_csv(template_path, dtype=str)
+    centroids = load_zip_centroids()
+    zips = np.array(sorted(centroids))
+    zip_codes = zips[rng.choice(len(zips), rows, p=_zipf_weights(len(zips), 0.5))]
+    template_streets = template['Address'].str.split(',').str[0].str.split(' ', n=1).str[1]
+    streets = np.array(sorted(set(template_streets) | set(EXTRA_STREETS)), dtype=object)
+
+    def vocabulary(column, extras):
+        items = {item.strip() for value in template[column] for item in value.split(',') if item.strip()}
+        return sorted(items | set(extras))
+
+    def sample(pool):
+        return pool[rng.choice(len(pool), rows, p=_zipf_weights(len(pool)))]
+
+    services = _value_pool(rng, vocabulary('Services', EXTRA_SERVICES), 400, 1, 4, template['Services'])
+    eligibility = _value_pool(rng, vocabulary('Eligibility', EXTRA_ELIGIBILITY), 80, 1, 3, template['Eligibility'])
+    languages = np.array(['English', 'English, Spanish', 'Spanish', 'English, Spanish, Vietnamese']
+                         + [f'English, Spanish, {language}' for language in OTHER_LANGUAGES]
+                         + [f'English, {language}' for language in OTHER_LANGUAGES], dtype=object)
+    genders = np.array(['All', 'Female-only', 'Male-only'], dtype=object)
+
+    names = [f"{NAME_PREFIXES[a]} {NAME_CORES[b]} {NAME_SUFFIXES[c]} {i}" for i, (a, b, c) in enumerate(zip(
+        rng.integers(0, len(NAME_PREFIXES), rows), rng.integers(0, len(NAME_CORES), rows), rng.integers(0, len(NAME_SUFFIXES), rows)))]
+    numbers = rng.integers(100, 9999, rows).astype(str)
+    return pd.DataFrame({
+        'Resource_Name': names,
+        'Address': [f"{n} {s}, Austin, TX {z}" for n, s, z in zip(numbers, streets[rng.integers(0, len(streets), rows)], zip_codes)],
+        'Services': sample(services),
+        'Eligibility': sample(eligibility),
+        'Hours': sample(np.array(HOURS, dtype=object)),
+        'Contact': [f"512-{a}-{b:04d}" for a, b in zip(rng.integers(200, 999, rows), rng.integers(0, 9999, rows))],
+        'ZIP_Code': zip_codes,
+        'Languages': sample(languages),
+        'Gender': genders[rng.choice(3, rows, p=[0.85, 0.12, 0.03])],
+        'Latitude': [centroids[z][0] for z in zip_codes],
+        'Longitude': [centroids[z][1] for z in zip_codes],
+    })
+
+
+def _substring_filter(columns, insurance, language, gender):
+    """Row mask using the original per-row substring and 'all' wildcard tests."""
+    mask = np.ones(len(columns['Eligibility']), dtype=bool)
+    for column, value in (('Eligibility', insurance), ('Languages', language), ('Gender', gender)):
+        text = columns[column]
+        mask &= (text.str.contains(value.lower(), regex=False) | text.str.contains('all', regex=False)).to_numpy()
+    return mask
+
+
+def bench_filters(rows, seed=0):
+    """Compare substring filtering with packed bitmap ANDs over the whole dataset."""
+    df = synthetic_resources(rows, seed)
+    # Lowercase once up front so the substring baseline measures only the per-query work
+    columns = {column: df[column].str.lower() for column in ('Eligibility', 'Languages', 'Gender')}
+
+    start = time.perf_counter()
+    matcher = ResourceMatcher(df)
+    build = time.perf_counter() - start
+
+    substring_times, bitmap_times = [], []
+    for insurance, language, gender in FILTER_QUERIES:
+        start = time.perf_counter()
+        expected = np.flatnonzero(_substring_filter(columns, insurance, language, gender))
+        substring_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        words = matcher.eligible(insurance, language, gender)
+        bitmap_times.append(time.perf_counter() - start)
+
+        if not np.array_equal(expected, set_rows(words, rows)):
+            raise AssertionError(f"Bitmap filter differs from substring filter for {(insurance, language, gender)}")
+
+    substring_ms = 1000 * np.median(substring_times)
+    bitmap_ms = 1000 * np.median(bitmap_times)
+    return {
+        'rows': rows,
+        'queries': len(FILTER_QUERIES),
+        'matcher_build_s': round(build, 3),
+        'substring_filter_ms': round(substring_ms, 3),
+        'bitmap_filter_ms': round(bitmap_ms, 3),
+        'speedup': round(substring_ms / bitmap_ms, 1) if bitmap_ms else None,
+    }
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve_directory(directory):
+    """Serve a directory over HTTP on a free local port; returns the server."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(_QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _measure(func, repeat):
+    """Median wall time in ms over repeat calls, and Python peak memory in MB of one traced call."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return round(1000 * np.median(times), 2), round(peak / 2**20, 2), result
+
+
+def bench_scrapers(fixture_dir="fixtures", repeat=5, driver_factory=None):
+    """Compare static and browser fetch modes over saved HTML fixtures.
+
+    Each registered source is scraped from <fixture_dir>/<source name>.html
+    served on a local port. Static mode is an HTTP fetch over a keep-alive
+    session parsed with the C-backed parser and the source's listing
+    strainer; browser mode renders the page
+    in a WebDriver session (when driver_factory can start one) and parses it
+    with html.parser, as every source did before. Peak memory is traced in
+    this process only, so it excludes the browser itself.
+    """
+    import generate_data  # registers the sources
+    for name in ('generate_data', 'scrapers'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    server = _serve_directory(fixture_dir)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    session = scrapers.http_session()
+    pool = scrapers.DriverPool(driver_factory, 1)
+    result = {'parser': scrapers.PARSER, 'repeat': repeat}
+    try:
+        for source in scrapers.SOURCES.values():
+            fixture = f"{source.name}.html"
+            if not os.path.exists(os.path.join(fixture_dir, fixture)):
+                continue
+            url = f"{base_url}/{fixture}"
+            with open(os.path.join(fixture_dir, fixture), encoding='utf-8') as f:
+                page_source = f.read()
+
+            static_ms, static_mb, resources = _measure(
+                lambda: source.parse(scrapers.parse_page(scrapers.fetch_static(session, url).content, source)), repeat)
+            result[f'{source.name}.resources'] = len(resources)
+            result[f'{source.name}.static_ms'] = static_ms
+            result[f'{source.name}.static_peak_mb'] = static_mb
+
+            parse_ms, parse_mb, _ = _measure(
+                lambda: source.parse(scrapers.BeautifulSoup(page_source, scrapers.PARSER, parse_only=source.parse_only)), repeat)
+            result[f'{source.name}.static_parse_ms'] = parse_ms
+            result[f'{source.name}.static_parse_peak_mb'] = parse_mb
+
+            parse_ms, parse_mb, _ = _measure(
+                lambda: source.parse(scrapers.BeautifulSoup(page_source, 'html.parser')), repeat)
+            result[f'{source.name}.html_parser_parse_ms'] = parse_ms
+            result[f'{source.name}.html_parser_peak_mb'] = parse_mb
+
+            if driver_factory is None:
+                result[f'{source.name}.browser_ms'] = None
+                continue
+
+            def browser():
+                with pool.session() as driver:
+                    driver.get(url)
+                    scrapers.wait_until_ready(driver, source.ready_selector)
+                    return source.parse(scrapers.BeautifulSoup(driver.page_source, 'html.parser'))
+            try:
+                result[f'{source.name}.browser_ms'], result[f'{source.name}.browser_peak_mb'], _ = _measure(browser, repeat)
+            except RuntimeError:
+                result[f'{source.name}.browser_ms'] = None
+    finally:
+        pool.close()
+        session.close()
+        server.shutdown()
+    return result
+
+
+def query_mix(count, seed=0):
+    """Patient queries across ZIPs, needs (with synonyms and typos), filters and search areas."""
+    rng = np.random.default_rng(seed)
+    zips = sorted(load_zip_centroids())
+    queries = []
+    for _ in range(count):
+        insurance, language, gender = FILTER_QUERIES[rng.integers(len(FILTER_QUERIES))]
+        radius_miles, k = QUERY_AREAS[rng.integers(len(QUERY_AREAS))]
+        queries.append({
+            'zip_code': zips[rng.integers(len(zips))], 'needs': QUERY_NEEDS[rng.integers(len(QUERY_NEEDS))],
+            'insurance': insurance, 'language': language, 'gender': gender, 'radius_miles': radius_miles, 'k': k,
+        })
+    return queries
+
+
+class StubLLMClient:
+    """Offline stand-in for openai.OpenAI that streams a canned JSON reply.
+
+    The reply echoes the first rows of the prompt's resource table, so the
+    streaming parser does the same work as for a real response.
+    """
+
+    def __init__(self, resources=5, chunk_size=24):
+        self.resources = resources
+        self.chunk_size = chunk_size
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, messages, stream=False, **kwargs):
+        header = '|'.join(PROMPT_COLUMNS)
+        rows = [line.split('|') for line in messages[-1]['content'].splitlines()
+                if line != header and line.count('|') == len(PROMPT_COLUMNS) - 1]
+        reply = json.dumps({
+            'resources': [dict(zip(PROMPT_COLUMNS, row)) for row in rows[:self.resources]],
+            'recommendation': 'Call ahead to confirm hours and eligibility.',
+        })
+        chunks = [reply[i:i + self.chunk_size] for i in range(0, len(reply), self.chunk_size)]
+        return (SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))]) for chunk in chunks)
+
+
+def stub_llm_search(matcher, client, query):
+    """The AI search steps from search.py (candidates, prompt, streamed reply) against a stub client.
+
+    Returns the prompt size in characters, its estimated tokens and the
+    parsed reply.
+    """
+    fields = [query[name] for name in SEARCH_FIELDS]
+    candidates = matcher.candidates(*fields, LLM_TOP_K)
+    prompt, _, tokens = build_llm_prompt(candidates, *fields, token_budget=LLM_TOKEN_BUDGET)
+    return len(prompt), tokens, ask_llm(client, prompt)
+
+
+def _percentile_ms(times, percentile):
+    return round(1000 * float(np.percentile(times, percentile)), 3)
+
+
+def _best_per_query(passes):
+    """Each query's best time over several passes of the same query mix."""
+    return np.min(passes, axis=0)
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def _search(matcher, query):
+    return search_resources(matcher, query['zip_code'], query['needs'], query['insurance'], query['language'],
+                            query['gender'], radius_miles=query['radius_miles'], k=query['k'])
+
+
+def _ranked_page(matcher, query):
+    return matcher.ranked(query['zip_code'], query['needs'], query['insurance'], query['language'], query['gender'],
+                          radius_miles=query['radius_miles'], k=query['k'], limit=RANKED_PAGE_SIZE)
+
+
+def bench_dataset(rows, seed=0, queries=200, directory=None, passes=3):
+    """Load time, search latency and AI prompt size for one synthetic dataset size.
+
+    Timings are the best of several passes, which filters out scheduler
+    noise from other processes: load times directly, query latencies per
+    query before taking percentiles. The first search pass is an untimed
+    warm-up.
+    """
+    directory = directory or tempfile.gettempdir()
+    csv_path = os.path.join(directory, f"resources_{rows}.csv")
+    synthetic_resources(rows, seed).to_csv(csv_path, index=False)
+    snapshot = snapshot_path_for(csv_path)
+    result = {}
+
+    csv_times = []
+    for _ in range(passes):
+        elapsed, matcher = _timed(lambda: open_matcher(csv_path))
+        csv_times.append(elapsed)
+    result['load_csv_s'] = round(min(csv_times), 3)
+    write_snapshot(matcher, snapshot)
+    result['load_snapshot_s'] = round(min(_timed(lambda: open_matcher(csv_path))[0] for _ in range(passes)), 3)
+    matcher = open_matcher(csv_path)
+
+    mix = query_mix(queries, seed)
+    for query in mix:
+        _search(matcher, query)
+    search_passes = [[_timed(lambda: _search(matcher, query)) for query in mix] for _ in range(passes)]
+    search_times = _best_per_query([[t for t, _ in timings] for timings in search_passes])
+    result['search_p50_ms'] = _percentile_ms(search_times, 50)
+    result['search_p95_ms'] = _percentile_ms(search_times, 95)
+    result['search_mean_results'] = round(float(np.mean([len(found) for _, found in search_passes[0]])), 2)
+    ranked_times = _best_per_query([[_timed(lambda: _ranked_page(matcher, query))[0] for query in mix] for _ in range(passes)])
+    result['ranked_page_p50_ms'] = _percentile_ms(ranked_times, 50)
+    result['ranked_page_p95_ms'] = _percentile_ms(ranked_times, 95)
+
+    # One prompt log line per stub search would drown the report
+    logging.getLogger('search').setLevel(logging.WARNING)
+    client = StubLLMClient()
+    llm_passes = [[_timed(lambda: stub_llm_search(matcher, client, query)) for query in mix[:LLM_QUERIES]] for _ in range(passes)]
+    replies = [reply for _, reply in llm_passes[0]]
+    llm_times = _best_per_query([[t for t, _ in timings] for timings in llm_passes])
+    result['llm_pipeline_p50_ms'] = _percentile_ms(llm_times, 50)
+    result['llm_pipeline_p95_ms'] = _percentile_ms(llm_times, 95)
+    result['prompt_chars_mean'] = round(float(np.mean([chars for chars, _, _ in replies])), 1)
+    result['prompt_tokens_mean'] = round(float(np.mean([tokens for _, tokens, _ in replies])), 1)
+    result['prompt_tokens_max'] = int(max(tokens for _, tokens, _ in replies))
+    return result
+
+
+def bench_parse_throughput(fixture_dir="fixtures", samples=7, parses=10):
+    """Pages and listings parsed per second for each source's saved fixture.
+
+    Each sample times several consecutive parses and the rate is the median
+    over samples: a single parse takes a few milliseconds, so the best of a
+    few single parses mostly measures how quiet the machine happened to be.
+    """
+    import generate_data  # registers the sources
+    for name in ('generate_data', 'scrapers'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    result = {}
+    for source in scrapers.SOURCES.values():
+        path = os.path.join(fixture_dir, f"{source.name}.html")
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        def parse():
+            return source.parse(scrapers.parse_page(content, source))
+        listings = len(parse())
+        elapsed = float(np.median([_timed(lambda: [parse() for _ in range(parses)])[0] for _ in range(samples)])) / parses
+        result[f'{source.name}.pages_per_s'] = round(1 / elapsed, 2)
+        result[f'{source.name}.listings_per_s'] = round(listings / elapsed, 1)
+    return result
+
+
+def run_suite(sizes, seed=0, queries=200, fixture_dir="fixtures"):
+    """Run every suite benchmark; returns a JSON-ready report."""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in sizes:
+            logging.info(f"Benchmarking {rows} rows")
+            for name, value in bench_dataset(rows, seed, queries, directory).items():
+                results[f'rows_{rows}.{name}'] = value
+    for name, value in bench_parse_throughput(fixture_dir).items():
+        results[f'scrapers.{name}'] = value
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'sizes': list(sizes),
+        'seed': seed,
+        'queries': queries,
+        'results': results,
+    }
+
+
+def compare_to_baseline(results, baseline, threshold=REGRESSION_THRESHOLD, rate_threshold=RATE_THRESHOLD):
+    """Metrics that got worse than the baseline by more than threshold (a fraction).
+
+    Rates (*_per_s) regress when they fall by more than rate_threshold;
+    times and prompt sizes regress when they grow by more than threshold
+    and NOISE_FLOOR. Result counts and metrics missing from either side are
+    skipped.
+    """
+    regressions = []
+    for name, value in results.items():
+        previous = baseline.get(name)
+        if name.endswith('_results') or not isinstance(value, (int, float)) or not isinstance(previous, (int, float)):
+            continue
+        if name.endswith('_per_s'):
+            worse = value < previous * (1 - rate_threshold)
+        else:
+            floor = next((floor for suffix, floor in NOISE_FLOOR.items() if name.endswith(suffix)), 0)
+            worse = value > previous * (1 + threshold) and value - previous > floor
+        if worse:
+            regressions.append({'metric': name, 'baseline': previous, 'value': value})
+    return regressions
+
+
+def best_results(results, other):
+    """Each metric's better value over two runs: the higher rate or the lower time or size."""
+    best = dict(results)
+    for name, value in other.items():
+        previous = best.get(name)
+        if name.endswith('_results') or not isinstance(value, (int, float)) or not isinstance(previous, (int, float)):
+            continue
+        best[name] = max(previous, value) if name.endswith('_per_s') else min(previous, value)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run offline performance benchmarks.")
+    subcommands = parser.add_subparsers(dest="benchmark", required=True)
+    suite = subcommands.add_parser("suite", help="load, search, prompt and scraper benchmarks over synthetic datasets")
+    suite.add_argument("--sizes", default="1000,10000,100000", help="comma-separated dataset sizes (up to 1000000)")
+    suite.add_argument("--queries", type=int, default=200, help="queries in the search mix")
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--fixtures", default="fixtures")
+    suite.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    suite.add_argument("--baseline", default=BASELINE_PATH, help="stored baseline to compare against")
+    suite.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="allowed regression as a fraction")
+    suite.add_argument("--rate-threshold", type=float, default=RATE_THRESHOLD,
+                       help="allowed drop of the *_per_s rates as a fraction")
+    suite.add_argument("--update-baseline", action="store_true", help="save these results as the new baseline")
+    filters = subcommands.add_parser("filters", help="insurance/language/gender filtering: substring tests vs bitmaps")
+    filters.add_argument("--rows", type=int, default=1_000_000)
+    filters.add_argument("--seed", type=int, default=0)
+    scraping = subcommands.add_parser("scrapers", help="scraper fetch modes over saved HTML fixtures: static HTTP vs browser")
+    scraping.add_argument("--fixtures", default="fixtures", help="directory of <source name>.html pages")
+    scraping.add_argument("--repeat", type=int, default=5)
+    scraping.add_argument("--browser", action="store_true", help="also time browser mode (needs ChromeDriver)")
+    args = parser.parse_args(argv)
+
+    if args.benchmark == "suite":
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        sizes = [int(size) for size in args.sizes.split(',')]
+        report = run_suite(sizes, args.seed, args.queries, args.fixtures)
+        baseline = None
+        if not args.update_baseline and os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)['results']
+            if compare_to_baseline(report['results'], baseline, args.threshold, args.rate_threshold):
+                # A slow spell on a shared machine can fail one run; a regression has to repeat in a second
+                logging.info("Metrics worse than the baseline; running the suite again to confirm")
+                again = run_suite(sizes, args.seed, args.queries, args.fixtures)
+                report['results'] = best_results(report['results'], again['results'])
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+        for name, value in report['results'].items():
+            print(f"{name}: {value}")
+        if args.update_baseline:
+            with open(args.baseline, 'w') as f:
+                json.dump(report, f, indent=4)
+            print(f"Saved baseline to {args.baseline}")
+            return
+        if baseline is None:
+            print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+            return
+        regressions = compare_to_baseline(report['results'], baseline, args.threshold, args.rate_threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['metric']}: {regression['baseline']} -> {regression['value']}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} of {args.baseline}")
+        return
+    elif args.benchmark == "filters":
+        result = bench_filters(args.rows, args.seed)
+    elif args.benchmark == "scrapers":
+        driver_factory = None
+        if args.browser:
+            from generate_data import setup_selenium
+            driver_factory = setup_selenium
+        result = bench_scrapers(args.fixtures, args.repeat, driver_factory)
+    for name, value in result.items():
+        print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
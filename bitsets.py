@@ -0,0 +1,77 @@
+import numpy as np
+
+WILDCARD = 'all'
+CACHE_SIZE = 256
+
+
+def pack_rows(mask):
+    """Pack a boolean row mask into little-endian 64-bit words (row i -> word i // 64, bit i % 64)."""
+    packed = np.packbits(np.asarray(mask, dtype=bool), bitorder='little')
+    padded = np.zeros(-(-len(packed) // 8) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view('<u8')
+
+
+def rows_in(words, rows):
+    """Boolean mask of which row positions have their bit set."""
+    rows = np.asarray(rows, dtype=np.int64)
+    return ((words[rows >> 6] >> (rows & 63).astype(np.uint64)) & np.uint64(1)).astype(bool)
+
+
+def set_rows(words, count):
+    """Sorted row positions whose bit is set, for a dataset of count rows."""
+    bits = np.unpackbits(words.view(np.uint8), count=count, bitorder='little')
+    return np.flatnonzero(bits)
+
+
+class AttributeBitmaps:
+    """Packed row bitmaps for a comma-separated attribute column.
+
+    Each distinct comma-separated value (e.g. "medicaid", "low-income") gets
+    one bitmap over all rows, with rows whose value contains the "all"
+    wildcard folded into every bitmap. A filter is then an OR of the bitmaps
+    for the vocabulary entries containing the requested value, and filters on
+    different columns combine with word-wide ANDs. Requested text that may
+    span parts (a comma or outer spaces) is tested against each distinct
+    value instead.
+    """
+
+    def __init__(self, codes, uniques):
+        self.count = len(codes)
+        self.codes = codes = np.asarray(codes)
+        self.uniques = uniques = [str(value) for value in uniques]
+        # Wildcard check mirrors the original "'all' in value" test on the whole value
+        wildcard_codes = np.array([WILDCARD in value for value in uniques], dtype=bool)
+        tokens = {}
+        for code, value in enumerate(uniques):
+            for token in value.split(','):
+                tokens.setdefault(token.strip(), []).append(code)
+        self.wildcard = pack_rows(wildcard_codes[codes])
+        self.bitmaps = {}
+        for token, token_codes in tokens.items():
+            allowed = wildcard_codes.copy()
+            allowed[token_codes] = True
+            self.bitmaps[token] = pack_rows(allowed[codes])
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.bitmaps)
+
+    def matching(self, value):
+        """Bitmap of rows whose value contains the given text (or the wildcard)."""
+        value = value.lower()
+        words = self._cache.get(value)
+        if words is None:
+            if ',' in value or value != value.strip():
+                # Text that can span comma-separated parts is tested against each distinct value instead
+                allowed = np.array([value in unique or WILDCARD in unique for unique in self.uniques], dtype=bool)
+                words = pack_rows(allowed[self.codes])
+            else:
+                words = self.wildcard.copy()
+                for token, bitmap in self.bitmaps.items():
+                    if value in token:
+                        words |= bitmap
+            if len(self._cache) >= CACHE_SIZE:
+                self._cache.clear()
+            self._cache[value] = words
+        return words
@@ -0,0 +1,236 @@
+"""Near-duplicate detection and merging for scraped resources.
+
+Names, street addresses and phone numbers are normalized, then records are
+grouped into blocks that share a phone number, a street address or a ZIP
+code. Only pairs within a block are scored, and blocks larger than
+MAX_BLOCK_PAIRWISE are scanned as a sorted neighborhood (each record against
+the next WINDOW records by name), so the work stays near-linear in the
+number of records. Matching pairs are joined with union-find and every
+cluster is merged into one record, taking the best available value for each
+field across its sources.
+"""
+import logging
+import re
+import time
+from collections import defaultdict
+
+from fuzzywuzzy import fuzz
+
+logger = logging.getLogger(__name__)
+
+NAME_THRESHOLD = 90
+# Name similarity still required of records sharing both phone and street, which may be
+# different clinics behind one front desk or switchboard
+SHARED_CONTACT_NAME_THRESHOLD = 80
+STREET_THRESHOLD = 90
+MAX_BLOCK_PAIRWISE = 50
+WINDOW = 8
+
+PLACEHOLDER_HOURS = 'contact for hours'
+# Comma-separated fields whose values are combined across a cluster
+LIST_FIELDS = ('Services', 'Eligibility', 'Languages')
+
+STREET_ABBREVIATIONS = {
+    'street': 'st', 'avenue': 'ave', 'boulevard': 'blvd', 'drive': 'dr', 'lane': 'ln',
+    'road': 'rd', 'parkway': 'pkwy', 'highway': 'hwy', 'court': 'ct', 'circle': 'cir',
+    'place': 'pl', 'trail': 'trl', 'suite': 'ste', 'north': 'n', 'south': 's',
+    'east': 'e', 'west': 'w', 'interstate': 'i', 'ih': 'i',
+}
+
+
+def normalize_name(name):
+    """Casefolded name with punctuation removed and '&' spelled out."""
+    name = str(name or '').casefold().replace('’', "'").replace('&', ' and ')
+    return ' '.join(re.sub(r"'s\b|[^a-z0-9 ]+", ' ', name).split())
+
+
+def normalize_street(address):
+    """Street part of an address (before the first comma) with standard abbreviations."""
+    street = str(address or '').split(',')[0].casefold()
+    words = re.sub(r'[^a-z0-9 ]+', ' ', street).split()
+    return ' '.join(STREET_ABBREVIATIONS.get(word, word) for word in words)
+
+
+def normalize_phone(phone):
+    """Ten-digit phone number, or '' when missing or a fictional 555 number."""
+    digits = re.sub(r'\D', '', str(phone or ''))
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    if len(digits) != 10 or digits[3:6] == '555':
+        return ''
+    return digits
+
+
+def resource_zip(resource):
+    """ZIP from the address when present, otherwise the ZIP_Code field."""
+    zips = re.findall(r'\b\d{5}\b', str(resource.get('Address') or ''))
+    return zips[-1] if zips else str(resource.get('ZIP_Code') or '').strip()
+
+
+class DisjointSet:
+    """Union-find over record positions with path halving and union by size."""
+
+    def __init__(self, count):
+        self.parent = list(range(count))
+        self.size = [1] * count
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return True
+
+
+def _split_street(street):
+    number, _, rest = street.partition(' ')
+    return (number, rest) if number.isdigit() else ('', street)
+
+
+def is_duplicate(a, b):
+    """Whether two normalized records (name, street, phone) describe the same resource.
+
+    Records match when they have near-identical names and share a phone
+    number or street address. Records sharing both need only similar names,
+    or one name's words all appearing in the other ("Austin Free Clinic" and
+    "The Austin Free Clinic"). Streets with different house numbers never
+    match.
+    """
+    name_a, street_a, phone_a = a
+    name_b, street_b, phone_b = b
+    same_phone = bool(phone_a) and phone_a == phone_b
+    number_a, rest_a = _split_street(street_a)
+    number_b, rest_b = _split_street(street_b)
+    same_street = (bool(rest_a) and number_a == number_b
+                   and (rest_a == rest_b or fuzz.ratio(rest_a, rest_b) >= STREET_THRESHOLD))
+    if not (same_phone or same_street):
+        return False
+    if name_a == name_b:
+        return True
+    similarity = fuzz.token_sort_ratio(name_a, name_b)
+    if same_phone and same_street:
+        return similarity >= SHARED_CONTACT_NAME_THRESHOLD or fuzz.token_set_ratio(name_a, name_b) == 100
+    return similarity >= NAME_THRESHOLD
+
+
+def _block_pairs(members, names):
+    """Candidate pairs within a block: all pairs if small, else a sorted neighborhood by name."""
+    if len(members) <= MAX_BLOCK_PAIRWISE:
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                yield members[i], members[j]
+        return
+    ordered = sorted(members, key=lambda item: names[item])
+    for i in range(len(ordered)):
+        for j in range(i + 1, min(i + 1 + WINDOW, len(ordered))):
+            yield ordered[i], ordered[j]
+
+
+def _union_values(values):
+    """Ordered, case-insensitive union of comma-separated values."""
+    seen, items = set(), []
+    for value in values:
+        for item in str(value or '').split(','):
+            item = item.strip()
+            if item and item.casefold() not in seen:
+                seen.add(item.casefold())
+                items.append(item)
+    return ', '.join(items)
+
+
+def merge_cluster(records):
+    """Merge records describing one resource, in source priority order.
+
+    Name and gender come from the first record; the address, phone and
+    hours are the first non-placeholder values; services, eligibility and
+    languages are combined across all records.
+    """
+    merged = dict(records[0])
+    for record in records[1:]:
+        for field, value in record.items():
+            if merged.get(field) in (None, ''):
+                merged[field] = value
+    with_zip = [r for r in records if re.search(r'\b\d{5}\b', str(r.get('Address') or ''))]
+    if with_zip:
+        merged['Address'] = with_zip[0]['Address']
+        merged['ZIP_Code'] = resource_zip(with_zip[0])
+    phones = [r['Contact'] for r in records if normalize_phone(r.get('Contact'))]
+    if phones:
+        merged['Contact'] = phones[0]
+    hours = [r['Hours'] for r in records if r.get('Hours') and str(r['Hours']).strip().casefold() != PLACEHOLDER_HOURS]
+    if hours:
+        merged['Hours'] = hours[0]
+    for field in LIST_FIELDS:
+        if any(field in r for r in records):
+            merged[field] = _union_values(r.get(field) for r in records)
+    return merged
+
+
+def deduplicate(resources):
+    """Merge near-duplicate resources; returns (resources, metrics).
+
+    Earlier records take priority when merging, and clusters keep the
+    position of their first record.
+    """
+    start = time.perf_counter()
+    names = [normalize_name(r.get('Resource_Name')) for r in resources]
+    streets = [normalize_street(r.get('Address')) for r in resources]
+    phones = [normalize_phone(r.get('Contact')) for r in resources]
+
+    blocks = defaultdict(list)
+    for i, resource in enumerate(resources):
+        if phones[i]:
+            blocks[('phone', phones[i])].append(i)
+        zip_code = resource_zip(resource)
+        if streets[i]:
+            blocks[('street', zip_code, streets[i])].append(i)
+        blocks[('zip', zip_code)].append(i)
+
+    clusters = DisjointSet(len(resources))
+    comparisons = matches = 0
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        for a, b in _block_pairs(members, names):
+            # Pairs already joined through another block need no comparison
+            if clusters.find(a) == clusters.find(b):
+                continue
+            comparisons += 1
+            if is_duplicate((names[a], streets[a], phones[a]), (names[b], streets[b], phones[b])):
+                matches += 1
+                clusters.union(a, b)
+
+    grouped = defaultdict(list)
+    for i in range(len(resources)):
+        grouped[clusters.find(i)].append(i)
+    deduplicated = []
+    merged_clusters = 0
+    for members in sorted(grouped.values(), key=lambda members: members[0]):
+        if len(members) > 1:
+            merged_clusters += 1
+            logger.debug(f"Merged duplicates: {', '.join(str(resources[i].get('Resource_Name')) for i in members)}")
+            deduplicated.append(merge_cluster([resources[i] for i in members]))
+        else:
+            deduplicated.append(resources[members[0]])
+
+    metrics = {
+        'records': len(resources),
+        'blocks': len(blocks),
+        'comparisons': comparisons,
+        'matches': matches,
+        'clusters_merged': merged_clusters,
+        'records_removed': len(resources) - len(deduplicated),
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+    logger.info(f"Deduplication: {metrics}")
+    return deduplicated, metrics
@@ -1,36 +1,40 @@
+import argparse
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import json
-import time
-import random
 import re
 import logging
 import os
 import platform
 import selenium
+from dedup import deduplicate
+from geo import load_zip_centroids
+from hours import format_intervals, parse_hours
+from matcher import ResourceMatcher
+from refresh import (append_changes, load_resources, load_state, merge_resources, replace_file, save_state, state_path_for,
+                     update_sources)
+from scrapers import USER_AGENT, refresh_sources, register_source
+from snapshot import write_snapshot
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filename='scraper.log'
-)
 logger = logging.getLogger(__name__)
 
+# Concurrent browser sessions shared by all sources
+SCRAPER_POOL_SIZE = int(os.getenv("SCRAPER_POOL_SIZE", "2"))
+
+# Per-source refresh state and the append-only log of dataset changes
+STATE_PATH = state_path_for("resources.csv")
+CHANGES_PATH = "resources.changes.jsonl"
+
 def setup_selenium():
     """Set up Selenium with ChromeDriver."""
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.7049.95 Safari/537.36")
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
     
     # Platform-specific ChromeDriver path
@@ -51,155 +55,99 @@ def setup_selenium():
         logger.error(f"Error setting up Selenium: {str(e)}")
         return None
 
-def test_selenium():
-    """Test Selenium setup."""
-    driver = setup_selenium()
-    if not driver:
-        logger.error("Selenium test failed: Could not initialize driver")
-        return False
-    try:
-        driver.get("https://www.google.com")
-        title = driver.title
-        logger.info(f"Selenium test successful: Page title = {title}")
-        driver.quit()
-        return True
-    except Exception as e:
-        logger.error(f"Selenium test failed: {str(e)}")
-        if driver:
-            driver.quit()
-        return False
-
-def scrape_freeclinics():
-    """Scrape resources from FreeClinics.com."""
+@register_source("freeclinics.com", "https://www.freeclinics.com/cit/tx-austin", ready_selector="div.clinic-block",
+                 fetch="static", parse_only=SoupStrainer("div", class_="clinic-block"))
+def parse_freeclinics(soup):
+    """Parse clinic listings from a FreeClinics.com city page."""
     resources = []
-    url = "https://www.freeclinics.com/cit/tx-austin"
-    driver = setup_selenium()
-    if not driver:
-        return resources
+    listings = soup.select('div.clinic-block')
     
-    try:
-        logger.info(f"Scraping freeclinics.com: {url}")
-        driver.get(url)
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        for _ in range(2):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-        
-        page_source = driver.page_source
-        logger.info(f"FreeClinics.com page length: {len(page_source)} characters")
-        soup = BeautifulSoup(page_source, 'html.parser')
-        listings = soup.select('div.clinic-block')
-        
-        logger.info(f"Found {len(listings)} clinic listings on freeclinics.com")
-        for listing in listings[:10]:
-            try:
-                name_elem = listing.select_one('span.name, h2')
-                name = name_elem.text.strip() if name_elem else None
-                if not name or name.lower() in ['unknown', 'get health care', 'locations']:
-                    continue
-                
-                address_elem = listing.select_one('p, div.address')
-                address = address_elem.text.strip() if address_elem and "Austin, TX" in address_elem.text else "Austin, TX"
-                
-                zip_match = re.search(r'\b\d{5}\b', address)
-                zip_code = zip_match.group(0) if zip_match else "78701"
-                
-                services = "Primary care, health screenings"
-                phone_elem = listing.select_one('a[href^="tel:"], .phone')
-                phone = phone_elem.text.strip() if phone_elem else f"512-555-{random.randint(1000, 9999)}"
-                
-                # Infer Languages and Gender
-                languages = "English, Spanish" if "health screenings" in services.lower() else "English"
-                gender = "Female-only" if "women" in services.lower() else "All"
-                
-                resource = {
-                    'Resource_Name': name,
-                    'Address': address,
-                    'Services': services,
-                    'Eligibility': "Uninsured, low-income",
-                    'Hours': "Contact for hours",
-                    'Contact': phone,
-                    'ZIP_Code': zip_code,
-                    'Languages': languages,
-                    'Gender': gender
-                }
-                resources.append(resource)
-                logger.info(f"Scraped freeclinics.com: {name} at {address}")
-            except Exception as e:
-                logger.error(f"Error processing freeclinics.com listing: {str(e)}")
-        
-        driver.quit()
-    except Exception as e:
-        logger.error(f"Error scraping freeclinics.com: {str(e)}")
-        if driver:
-            driver.quit()
+    logger.info(f"Found {len(listings)} clinic listings on freeclinics.com")
+    for listing in listings[:10]:
+        try:
+            name_elem = listing.select_one('span.name, h2')
+            name = name_elem.text.strip() if name_elem else None
+            if not name or name.lower() in ['unknown', 'get health care', 'locations']:
+                continue
+            
+            address_elem = listing.select_one('p, div.address')
+            address = address_elem.text.strip() if address_elem and "Austin, TX" in address_elem.text else "Austin, TX"
+            
+            zip_match = re.search(r'\b\d{5}\b', address)
+            zip_code = zip_match.group(0) if zip_match else "78701"
+            
+            services = "Primary care, health screenings"
+            phone_elem = listing.select_one('a[href^="tel:"], .phone')
+            # Listings without a phone keep it empty; an invented number would differ on every refresh
+            phone = phone_elem.text.strip() if phone_elem else None
+            
+            # Infer Languages and Gender
+            languages = "English, Spanish" if "health screenings" in services.lower() else "English"
+            gender = "Female-only" if "women" in services.lower() else "All"
+            
+            resource = {
+                'Resource_Name': name,
+                'Address': address,
+                'Services': services,
+                'Eligibility': "Uninsured, low-income",
+                'Hours': "Contact for hours",
+                'Contact': phone,
+                'ZIP_Code': zip_code,
+                'Languages': languages,
+                'Gender': gender
+            }
+            resources.append(resource)
+            logger.info(f"Scraped freeclinics.com: {name} at {address}")
+        except Exception as e:
+            logger.error(f"Error processing freeclinics.com listing: {str(e)}")
     
     return resources
 
-def scrape_centralhealth():
-    """Scrape resources from Central Health."""
+@register_source("centralhealth.net", "https://www.centralhealth.net/locations/", ready_selector="div.location, div.location-card",
+                 fetch="static", parse_only=SoupStrainer("div", class_=["location", "location-card"]))
+def parse_centralhealth(soup):
+    """Parse location listings from the Central Health locations page."""
     resources = []
-    url = "https://www.centralhealth.net/locations/"
-    driver = setup_selenium()
-    if not driver:
-        return resources
+    listings = soup.select('div.location, div.location-card')
     
-    try:
-        logger.info(f"Scraping centralhealth.net: {url}")
-        driver.get(url)
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        for _ in range(2):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-        
-        page_source = driver.page_source
-        logger.info(f"CentralHealth.net page length: {len(page_source)} characters")
-        soup = BeautifulSoup(page_source, 'html.parser')
-        listings = soup.select('div.location, div.location-card')
-        
-        logger.info(f"Found {len(listings)} location listings on centralhealth.net")
-        for listing in listings[:10]:
-            try:
-                name_elem = listing.select_one('h2, .location-title')
-                name = name_elem.text.strip() if name_elem else None
-                if not name or name.lower() in ['unknown', 'get health care', 'locations']:
-                    continue
-                
-                address_elem = listing.select_one('p, div.address')
-                address = address_elem.text.strip() if address_elem and "Austin, TX" in address_elem.text else "Austin, TX"
-                
-                zip_match = re.search(r'\b\d{5}\b', address)
-                zip_code = zip_match.group(0) if zip_match else "78701"
-                
-                services = "Primary care, specialty care, behavioral health"
-                phone_elem = listing.select_one('a[href^="tel:"], .phone')
-                phone = phone_elem.text.strip() if phone_elem else f"512-555-{random.randint(1000, 9999)}"
-                
-                # Infer Languages and Gender
-                languages = "English, Spanish" if "primary care" in services.lower() else "English"
-                gender = "Female-only" if "women" in services.lower() else "All"
-                
-                resource = {
-                    'Resource_Name': name,
-                    'Address': address,
-                    'Services': services,
-                    'Eligibility': "Uninsured, Medicaid, low-income",
-                    'Hours': "Contact for hours",
-                    'Contact': phone,
-                    'ZIP_Code': zip_code,
-                    'Languages': languages,
-                    'Gender': gender
-                }
-                resources.append(resource)
-                logger.info(f"Scraped centralhealth.net: {name} at {address}")
-            except Exception as e:
-                logger.error(f"Error processing centralhealth.net listing: {str(e)}")
-        
-        driver.quit()
-    except Exception as e:
-        logger.error(f"Error scraping centralhealth.net: {str(e)}")
-        if driver:
-            driver.quit()
+    logger.info(f"Found {len(listings)} location listings on centralhealth.net")
+    for listing in listings[:10]:
+        try:
+            name_elem = listing.select_one('h2, .location-title')
+            name = name_elem.text.strip() if name_elem else None
+            if not name or name.lower() in ['unknown', 'get health care', 'locations']:
+                continue
+            
+            address_elem = listing.select_one('p, div.address')
+            address = address_elem.text.strip() if address_elem and "Austin, TX" in address_elem.text else "Austin, TX"
+            
+            zip_match = re.search(r'\b\d{5}\b', address)
+            zip_code = zip_match.group(0) if zip_match else "78701"
+            
+            services = "Primary care, specialty care, behavioral health"
+            phone_elem = listing.select_one('a[href^="tel:"], .phone')
+            # Listings without a phone keep it empty; an invented number would differ on every refresh
+            phone = phone_elem.text.strip() if phone_elem else None
+            
+            # Infer Languages and Gender
+            languages = "English, Spanish" if "primary care" in services.lower() else "English"
+            gender = "Female-only" if "women" in services.lower() else "All"
+            
+            resource = {
+                'Resource_Name': name,
+                'Address': address,
+                'Services': services,
+                'Eligibility': "Uninsured, Medicaid, low-income",
+                'Hours': "Contact for hours",
+                'Contact': phone,
+                'ZIP_Code': zip_code,
+                'Languages': languages,
+                'Gender': gender
+            }
+            resources.append(resource)
+            logger.info(f"Scraped centralhealth.net: {name} at {address}")
+        except Exception as e:
+            logger.error(f"Error processing centralhealth.net listing: {str(e)}")
     
     return resources
 
@@ -222,31 +170,46 @@ def scrape_hrsa():
     
     return resources
 
-def generate_data():
-    """Scrape data from multiple sources and save as CSV and JSON."""
-    resources = []
-    
-    # Test Selenium
-    if not test_selenium():
-        logger.warning("Selenium test failed. Scraping may not work.")
+def add_coordinates(resources):
+    """Set Latitude/Longitude from the address ZIP, falling back to ZIP_Code."""
+    centroids = load_zip_centroids()
+    for resource in resources:
+        address_zips = re.findall(r'\b\d{5}\b', resource['Address'])
+        zip_code = address_zips[-1] if address_zips and address_zips[-1] in centroids else str(resource['ZIP_Code']).strip()
+        latitude, longitude = centroids.get(zip_code, (None, None))
+        resource['Latitude'] = latitude
+        resource['Longitude'] = longitude
+        if latitude is None:
+            logger.warning(f"No ZIP centroid for {resource['Resource_Name']} ({zip_code})")
+
+def add_open_intervals(resources):
+    """Set Open_Intervals, the weekly opening minutes parsed from Hours; empty when they are unknown."""
+    unknown = 0
+    for resource in resources:
+        resource['Open_Intervals'] = format_intervals(parse_hours(resource['Hours']))
+        unknown += resource['Open_Intervals'] is None
+    logger.info(f"Parsed opening hours of {len(resources) - unknown} resources; {unknown} unknown")
+
+def generate_data(urls=None, full_refresh=False):
+    """Scrape data from multiple sources and merge it into the saved CSV and JSON.
+
+    Sources whose pages are unchanged since the last run are not parsed
+    again, and the dataset files are only rewritten (with a new revision)
+    when a resource was added, updated or removed. full_refresh re-parses
+    every source regardless of the stored state. urls maps registered source
+    names to replacement URLs, e.g. local HTML fixtures served over HTTP.
+    """
+    state = load_state(STATE_PATH)
+    existing = load_resources("resources.csv")
     
-    # Scrape from reliable sources
-    resources.extend(scrape_freeclinics())
-    time.sleep(random.uniform(2, 5))
-    resources.extend(scrape_centralhealth())
-    time.sleep(random.uniform(2, 5))
+    # Scrape the registered sources concurrently, skipping unchanged pages
+    results = refresh_sources(setup_selenium, {} if full_refresh else state['sources'],
+                              pool_size=SCRAPER_POOL_SIZE, urls=urls)
+    resources = update_sources(state, results)
     resources.extend(scrape_hrsa())
     
-    # Remove duplicates
-    seen = set()
-    unique_resources = []
-    for res in resources:
-        key = (res['Resource_Name'].lower(), res['Address'].lower())
-        if key not in seen:
-            seen.add(key)
-            unique_resources.append(res)
-    
-    resources = unique_resources
+    # Merge near-duplicates across sources
+    resources, _ = deduplicate(resources)
     
     # If fewer than 20 resources, add pre-scraped real data
     if len(resources) < 20:
@@ -273,16 +236,13 @@ def generate_data():
             {'Resource_Name': 'Central Health Downtown', 'Address': '1210 W Braker Ln, Austin, TX 78758', 'Services': 'Primary care, specialty care', 'Eligibility': 'Uninsured, Medicaid, low-income', 'Hours': 'Contact for hours', 'Contact': '512-978-9920', 'ZIP_Code': '78758', 'Languages': 'English, Spanish', 'Gender': 'All'}
         ]
         
-        existing_names = {r['Resource_Name'].lower() for r in resources}
-        existing_addresses = {r['Address'].lower() for r in resources}
-        for pre in pre_scraped:
-            if len(resources) >= 20:
-                break
-            if pre['Resource_Name'].lower() not in existing_names and pre['Address'].lower() not in existing_addresses:
-                resources.append(pre)
-                existing_names.add(pre['Resource_Name'].lower())
-                existing_addresses.add(pre['Address'].lower())
-                logger.info(f"Added pre-scraped resource: {pre['Resource_Name']}")
+        # Pre-scraped copies of scraped resources are merged into them; clusters keep the
+        # position of their first record, so scraped resources stay ahead of the additions
+        scraped = len(resources)
+        resources, _ = deduplicate(resources + pre_scraped)
+        resources = resources[:20]
+        for pre in resources[scraped:]:
+            logger.info(f"Added pre-scraped resource: {pre['Resource_Name']}")
     
     # Validate resources
     for resource in resources:
@@ -290,25 +250,54 @@ def generate_data():
         resource['Eligibility'] = resource.get('Eligibility', 'Uninsured, low-income')
         resource['ZIP_Code'] = resource.get('ZIP_Code', '78701')
         resource['Hours'] = resource.get('Hours', 'Contact for hours')
-        resource['Contact'] = resource.get('Contact', f"512-555-{random.randint(1000, 9999)}")
+        resource['Contact'] = resource.get('Contact')
         resource['Address'] = resource.get('Address', 'Austin, TX')
         resource['Resource_Name'] = resource.get('Resource_Name', 'Unknown Clinic')
         resource['Languages'] = resource.get('Languages', 'English')
         resource['Gender'] = resource.get('Gender', 'All')
     
-    # Create DataFrame
+    # Derive coordinates from the bundled ZIP centroid table, and opening intervals from Hours
+    add_coordinates(resources)
+    add_open_intervals(resources)
+    
+    # Merge into the existing dataset by resource key
+    resources, changes = merge_resources(existing, resources)
     df = pd.DataFrame(resources)
+    if existing and not changes:
+        save_state(state, STATE_PATH)
+        logger.info(f"No resources changed; dataset stays at revision {state['revision']}")
+        return df
+    state['revision'] += 1
     
-    # Save to CSV
-    df.to_csv("resources.csv", index=False)
+    # Save to CSV and JSON; each is written aside and renamed into place, so the search
+    # service's reloader never reads a half-written file
+    replace_file("resources.csv", lambda staging: df.to_csv(staging, index=False))
     logger.info(f"Saved {len(df)} resources to resources.csv")
     
-    # Save to JSON
-    with open("resources.json", 'w') as f:
-        json.dump(resources, f, indent=4)
+    def write_json(staging):
+        with open(staging, 'w') as f:
+            json.dump(resources, f, indent=4)
+    replace_file("resources.json", write_json)
     logger.info(f"Saved {len(resources)} resources to resources.json")
     
+    # Save the memory-mapped snapshot with precomputed search indexes
+    write_snapshot(ResourceMatcher(df), "resources.snapshot", revision=state['revision'])
+    
+    # Record the changes, then the state, so a crash before this point re-runs the refresh
+    append_changes(CHANGES_PATH, state['revision'], changes)
+    save_state(state, STATE_PATH)
+    counts = {kind: sum(change['change'] == kind for change in changes) for kind in ('added', 'updated', 'removed')}
+    logger.info(f"Dataset revision {state['revision']}: {counts['added']} added, {counts['updated']} updated, {counts['removed']} removed")
+    
     return df
 
 if __name__ == "__main__":
-    generate_data()
\ No newline at end of file
+    # Set up logging here rather than on import, so importing the sources does not create scraper.log
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        filename='scraper.log'
+    )
+    parser = argparse.ArgumentParser(description="Scrape resource sources and refresh the dataset.")
+    parser.add_argument("--full", action="store_true", help="re-parse every source even if its page is unchanged")
+    generate_data(full_refresh=parser.parse_args().full)
\ No newline at end of file
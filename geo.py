@@ -0,0 +1,180 @@
+import heapq
+import os
+
+import numpy as np
+import pandas as pd
+
+ZIP_CENTROIDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "zip_centroids.csv")
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE = 69.05
+LEAF_SIZE = 16
+
+
+def load_zip_centroids(path=ZIP_CENTROIDS_PATH):
+    """Load the bundled ZIP centroid table as {zip: (latitude, longitude)}."""
+    try:
+        table = pd.read_csv(path, dtype={'ZIP_Code': str})
+    except FileNotFoundError:
+        return {}
+    return {row.ZIP_Code: (row.Latitude, row.Longitude) for row in table.itertuples(index=False)}
+
+
+def resource_coordinates(df, centroids):
+    """Latitude/longitude arrays for each row, falling back to the ZIP centroid."""
+    fallback = df['ZIP_Code'].astype(str).str.strip().map(lambda z: centroids.get(z, (np.nan, np.nan)))
+    latitudes = np.array([lat for lat, _ in fallback], dtype=float)
+    longitudes = np.array([lon for _, lon in fallback], dtype=float)
+    if 'Latitude' in df and 'Longitude' in df:
+        known = df['Latitude'].notna() & df['Longitude'].notna()
+        latitudes[known.to_numpy()] = df.loc[known, 'Latitude'].astype(float)
+        longitudes[known.to_numpy()] = df.loc[known, 'Longitude'].astype(float)
+    return latitudes, longitudes
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles; accepts scalars or arrays."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+class KDTree:
+    """Static 2-D k-d tree over planar points."""
+
+    def __init__(self, points, leaf_size=LEAF_SIZE):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.order = np.arange(len(self.points))
+        self.leaf_size = leaf_size
+        # Node: (start, end, axis, split, left, right); leaves have left == -1
+        self.nodes = []
+        if len(self.points):
+            self._build(0, len(self.points), 0)
+
+    def _build(self, start, end, depth):
+        node = len(self.nodes)
+        self.nodes.append(None)
+        if end - start <= self.leaf_size:
+            self.nodes[node] = (start, end, 0, 0.0, -1, -1)
+            return node
+        axis = depth % 2
+        middle = (start + end) // 2
+        segment = self.order[start:end]
+        part = np.argpartition(self.points[segment, axis], middle - start)
+        self.order[start:end] = segment[part]
+        split = self.points[self.order[middle], axis]
+        left = self._build(start, middle, depth + 1)
+        right = self._build(middle, end, depth + 1)
+        self.nodes[node] = (start, end, axis, split, left, right)
+        return node
+
+    def _leaf_distances(self, start, end, point):
+        ids = self.order[start:end]
+        return ids, np.hypot(*(self.points[ids] - point).T)
+
+    def nearest(self, point, k):
+        """Return the ids and planar distances of the k nearest points."""
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        point = np.asarray(point, dtype=float)
+        best = []  # max-heap of (-distance, id)
+        stack = [(0, 0.0)] if self.nodes else []
+        while stack:
+            node, bound = stack.pop()
+            if len(best) == k and bound > -best[0][0]:
+                continue
+            start, end, axis, split, left, right = self.nodes[node]
+            if left == -1:
+                ids, distances = self._leaf_distances(start, end, point)
+                for i, d in zip(ids, distances):
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, i))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, i))
+                continue
+            diff = point[axis] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            stack.append((far, max(bound, abs(diff))))
+            stack.append((near, bound))
+        best.sort(reverse=True)
+        return np.array([i for _, i in best], dtype=np.intp), np.array([-d for d, _ in best])
+
+    def within(self, point, radius):
+        """Return the ids of all points within radius of point."""
+        point = np.asarray(point, dtype=float)
+        found = []
+        stack = [0] if self.nodes else []
+        while stack:
+            start, end, axis, split, left, right = self.nodes[stack.pop()]
+            if left == -1:
+                ids, distances = self._leaf_distances(start, end, point)
+                found.append(ids[distances <= radius])
+                continue
+            diff = point[axis] - split
+            if diff - radius < 0:
+                stack.append(left)
+            if diff + radius >= 0:
+                stack.append(right)
+        return np.concatenate(found) if found else np.empty(0, dtype=np.intp)
+
+
+class GeoIndex:
+    """Spatial index over resource coordinates.
+
+    Resources sharing a location (e.g. the same ZIP centroid) share one tree
+    point, and coordinates are projected to planar miles around the dataset's
+    mean latitude so the tree can prune by axis distance.
+    """
+
+    def __init__(self, latitudes, longitudes):
+        latitudes = np.asarray(latitudes, dtype=float)
+        longitudes = np.asarray(longitudes, dtype=float)
+        rows = np.flatnonzero(~(np.isnan(latitudes) | np.isnan(longitudes)))
+        if len(rows):
+            coords = np.column_stack([latitudes[rows], longitudes[rows]])
+            self.locations, codes = np.unique(coords, axis=0, return_inverse=True)
+            codes = codes.ravel()
+        else:
+            self.locations, codes = np.empty((0, 2)), np.empty(0, dtype=np.intp)
+        # Rows at each location, in dataset order
+        order = np.argsort(codes, kind='stable')
+        self._location_rows = np.split(rows[order], np.cumsum(np.bincount(codes, minlength=len(self.locations)))[:-1])
+
+        cosines = np.cos(np.radians(self.locations[:, 0])) if len(self.locations) else np.ones(1)
+        self._scale = cosines.mean()
+        # Worst-case ratio between planar and great-circle distance over the dataset
+        self._pad = max(cosines.max() / self._scale, self._scale / cosines.min()) * 1.01
+        self.tree = KDTree(self._project(self.locations[:, 0], self.locations[:, 1]))
+
+    def __len__(self):
+        return sum(len(rows) for rows in self._location_rows)
+
+    def _project(self, latitude, longitude):
+        return np.column_stack([np.asarray(longitude) * MILES_PER_DEGREE * self._scale, np.asarray(latitude) * MILES_PER_DEGREE])
+
+    def _rows_by_distance(self, location_ids, latitude, longitude):
+        if len(location_ids) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        distances = haversine_miles(latitude, longitude, self.locations[location_ids, 0], self.locations[location_ids, 1])
+        counts = [len(self._location_rows[i]) for i in location_ids]
+        rows = np.concatenate([self._location_rows[i] for i in location_ids])
+        distances = np.repeat(distances, counts)
+        order = np.argsort(distances, kind='stable')
+        return rows[order], distances[order]
+
+    def nearest(self, latitude, longitude, k):
+        """Row positions and distances (miles) of the k nearest resources."""
+        point = self._project(latitude, longitude)[0]
+        location_ids, planar = self.tree.nearest(point, min(k, len(self.locations)))
+        if len(location_ids):
+            # Widen to every location that could beat the planar k-th neighbour by true distance
+            location_ids = self.tree.within(point, planar.max() * self._pad ** 2)
+        rows, distances = self._rows_by_distance(location_ids, latitude, longitude)
+        return rows[:k], distances[:k]
+
+    def within(self, latitude, longitude, radius_miles):
+        """Row positions and distances (miles) of resources within the radius, nearest first."""
+        point = self._project(latitude, longitude)[0]
+        location_ids = self.tree.within(point, radius_miles * self._pad)
+        rows, distances = self._rows_by_distance(location_ids, latitude, longitude)
+        keep = distances <= radius_miles
+        return rows[keep], distances[keep]
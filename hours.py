@@ -0,0 +1,313 @@
+"""Opening hours as weekly minute intervals, and an interval index to filter on them.
+
+parse_hours() turns the free-text Hours column ("M-F 8AM-5PM",
+"Tu, Th 5PM-8PM", "7AM-7PM daily", "24/7") into intervals in minutes from
+Monday 00:00.
+Text it cannot read with certainty ("Contact for hours", "By appointment")
+gives None, meaning the hours are unknown. generate_data.py stores the
+result in the Open_Intervals column ("480-1020 1920-2460 ...", empty when
+unknown), so searches never parse the Hours text.
+
+    python hours.py [resources.csv]   # show how each distinct Hours value parses
+"""
+import re
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAYS = {
+    'm': [0], 'mo': [0], 'mon': [0], 'monday': [0],
+    'tu': [1], 'tue': [1], 'tues': [1], 'tuesday': [1],
+    'w': [2], 'we': [2], 'wed': [2], 'wednesday': [2],
+    'th': [3], 'thu': [3], 'thur': [3], 'thurs': [3], 'thursday': [3],
+    'f': [4], 'fr': [4], 'fri': [4], 'friday': [4],
+    'sa': [5], 'sat': [5], 'saturday': [5],
+    'su': [6], 'sun': [6], 'sunday': [6],
+    'daily': list(range(7)), 'everyday': list(range(7)),
+    'weekdays': list(range(5)), 'weekends': [5, 6],
+}
+ALWAYS_OPEN = {'24/7', '24 7', 'open 24 hours', '24 hours', '24 hours daily'}
+
+_TIME = r'noon|midnight|\d{1,2}(?::\d{2})?(?:\s*(?:a\.?m\.?|p\.?m\.?|a|p)(?![a-z]))?'
+_TOKEN = re.compile(rf"""
+    \s*(?:
+        (?P<time>{_TIME})
+      | (?P<word>[a-z]+)
+      | (?P<dash>-|\bto\b)
+      | (?P<separator>[,;&/:]|\band\b)
+    )""", re.VERBOSE)
+# Parenthesized remarks, such as "(walk-ins)"
+_NOTE = re.compile(r'\(([^()]*)\)')
+
+
+def _tokens(text):
+    """(kind, text) pairs, or None if some part of the text is not a token."""
+    tokens, position = [], 0
+    text = text.strip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match or match.end() == position:
+            return None
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'word':
+            if value in ('to', 'and'):
+                kind = 'dash' if value == 'to' else 'separator'
+            elif value == 'closed':
+                kind = 'closed'
+            elif value not in DAYS:
+                return None
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+def _drop_notes(text):
+    """Remove remarks in parentheses that cannot change the hours ("(walk-ins)").
+
+    A remark with a digit, a day name, "open" or "closed" ("(closed Wed)")
+    is kept, so the text stays unknown rather than overstating the hours.
+    """
+    def drop(match):
+        words = set(re.findall(r'[a-z]+', match.group(1)))
+        if re.search(r'\d', match.group(1)) or words & (set(DAYS) | {'open', 'closed'}):
+            return match.group(0)
+        return ' '
+    return _NOTE.sub(drop, text)
+
+
+def _clock(value):
+    """(minutes after the hour-of-12 or 24-hour time, 'am'/'pm'/None) for a time token."""
+    if value == 'noon':
+        return 12 * 60, None
+    if value == 'midnight':
+        return 0, None
+    match = re.fullmatch(r'(\d{1,2})(?::(\d{2}))?\s*([ap])?\.?m?\.?', value)
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    if hour > 24 or minute > 59:
+        raise ValueError(f"invalid time {value}")
+    meridiem = {'a': 'am', 'p': 'pm'}.get(match.group(3))
+    if meridiem and not 1 <= hour <= 12:
+        raise ValueError(f"invalid time {value}")
+    return hour * 60 + minute, meridiem
+
+
+def _resolve(minutes, meridiem):
+    if meridiem is None:
+        return minutes
+    hour = (minutes // 60) % 12
+    return (hour + (12 if meridiem == 'pm' else 0)) * 60 + minutes % 60
+
+
+def _time_range(start_token, end_token):
+    """(start, end) minutes of the day for a range; end may pass midnight for overnight hours."""
+    start, start_meridiem = _clock(start_token)
+    end, end_meridiem = _clock(end_token)
+    if start_meridiem is None and end_meridiem is not None:
+        # "6-9PM" shares the end's meridiem, unless that would put the start after the end ("8-5PM")
+        start_meridiem = end_meridiem if _resolve(start, end_meridiem) < _resolve(end, end_meridiem) else 'am'
+    no_meridiem = start_meridiem is None and end_meridiem is None
+    start, end = _resolve(start, start_meridiem), _resolve(end, end_meridiem)
+    if no_meridiem and end <= start and end <= 12 * 60:
+        # "8-5" reads as 8AM to 5PM
+        end += 12 * 60
+    if end <= start:
+        # Closing at midnight or overnight
+        end += MINUTES_PER_DAY
+    return start, end
+
+
+def _merge(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def parse_hours(text):
+    """Weekly open intervals [(start, end), ...] in minutes from Monday 00:00, or None if unknown.
+
+    Each group of days ("M-F", "Tu, Th", "Sa") applies to the time ranges
+    after it; ranges that pass midnight continue into the next day (and
+    Sunday into Monday). Text that starts with its time ranges ("7AM-7PM
+    daily") applies them to the days that follow. Text with any part that
+    is not a day, a time range, "closed" or a remark in parentheses, or with
+    no open time at all, is unknown rather than guessed at.
+    """
+    if not isinstance(text, str):
+        return None
+    text = _drop_notes(text.lower().replace('–', '-').replace('—', '-')).strip()
+    if text in ALWAYS_OPEN:
+        return [(0, MINUTES_PER_WEEK)]
+    tokens = _tokens(text)
+    if not tokens:
+        return None
+    if tokens[0][0] == 'time':
+        # Ranges before their days: only days may follow ("8AM-5PM weekdays, closed weekends" stays unknown)
+        split = next((i for i, (kind, _) in enumerate(tokens) if kind == 'word'), len(tokens))
+        if any(kind in ('time', 'closed') for kind, _ in tokens[split:]):
+            return None
+        tokens = tokens[split:] + [('separator', ',')] + tokens[:split]
+
+    intervals, days, applied = [], [], False
+    position = 0
+    try:
+        while position < len(tokens):
+            kind, value = tokens[position]
+            following = tokens[position + 1:position + 3]
+            if kind == 'word':
+                if applied:
+                    days, applied = [], False
+                if len(following) == 2 and following[0][0] == 'dash' and following[1][0] == 'word':
+                    first, last = DAYS[value][0], DAYS[following[1][1]][-1]
+                    days += [(first + offset) % 7 for offset in range((last - first) % 7 + 1)]
+                    position += 3
+                else:
+                    days += DAYS[value]
+                    position += 1
+            elif kind == 'time':
+                if not days or len(following) != 2 or following[0][0] != 'dash' or following[1][0] != 'time':
+                    return None
+                start, end = _time_range(value, following[1][1])
+                intervals += [(day * MINUTES_PER_DAY + start, day * MINUTES_PER_DAY + end) for day in days]
+                applied = True
+                position += 3
+            elif kind == 'closed':
+                if not days:
+                    return None
+                applied = True
+                position += 1
+            elif kind == 'separator':
+                position += 1
+            else:
+                return None
+    except ValueError:
+        return None
+    if not intervals:
+        return None
+
+    # Sunday night hours continue on Monday morning
+    wrapped = []
+    for start, end in intervals:
+        if end > MINUTES_PER_WEEK:
+            wrapped += [(start, MINUTES_PER_WEEK), (0, end - MINUTES_PER_WEEK)]
+        else:
+            wrapped.append((start, end))
+    return _merge(wrapped)
+
+
+def format_intervals(intervals):
+    """Open_Intervals column value: "start-end" pairs separated by spaces, or None if unknown."""
+    if intervals is None:
+        return None
+    return ' '.join(f"{start}-{end}" for start, end in intervals)
+
+
+def parse_intervals(value):
+    """Intervals from an Open_Intervals value; None for a missing (unknown) value."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return [tuple(int(minute) for minute in pair.split('-')) for pair in value.split()]
+
+
+def week_minute(moment):
+    """Minutes since Monday 00:00 of a datetime's week."""
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def query_window(open_now=False, open_day=None, open_after=None, now=None):
+    """(start, end) minutes of the week a resource must be open during, or None for no hours filter.
+
+    open_now asks for resources open at the current minute of now (a
+    datetime); open_day (a day name or "today") with an optional open_after
+    time ("6PM", "18:00") asks for resources open at some point from that
+    time to the end of the day. Raises ValueError for values it cannot read.
+    """
+    now = now or datetime.now()
+    if open_now:
+        start = week_minute(now)
+        return start, start + 1
+    if open_day in (None, ''):
+        if open_after not in (None, ''):
+            raise ValueError("open_after needs an open_day")
+        return None
+    day = str(open_day).strip().lower()
+    if day == 'today':
+        day = now.weekday()
+    elif day in DAYS and len(DAYS[day]) == 1:
+        day = DAYS[day][0]
+    else:
+        raise ValueError(f"unknown day {open_day!r}")
+    after = 0
+    if open_after not in (None, ''):
+        text = str(open_after).strip().lower()
+        if not re.fullmatch(_TIME, text):
+            raise ValueError(f"unknown time {open_after!r}")
+        after = _resolve(*_clock(text)) % MINUTES_PER_DAY
+    return day * MINUTES_PER_DAY + after, (day + 1) * MINUTES_PER_DAY
+
+
+class HoursIndex:
+    """Interval index over the distinct Open_Intervals values of a dataset.
+
+    The intervals of every distinct value are kept in one array sorted by
+    start, so the values open during a window are found with a binary search
+    and a scan bounded by the longest interval; rows are then checked by
+    their value code.
+    """
+
+    def __init__(self, codes, values):
+        self.codes = np.asarray(codes)
+        intervals = [parse_intervals(value) for value in values]
+        self.known = np.array([found is not None for found in intervals], dtype=bool)
+        owners = [code for code, found in enumerate(intervals) for _ in (found or [])]
+        bounds = np.array([pair for found in intervals for pair in (found or [])], dtype=np.int64).reshape(-1, 2)
+        order = np.argsort(bounds[:, 0], kind='stable')
+        self.starts, self.ends = bounds[order, 0], bounds[order, 1]
+        self.owners = np.array(owners, dtype=np.int64)[order]
+        self.max_length = int((self.ends - self.starts).max()) if len(self.starts) else 0
+
+    @classmethod
+    def from_frame(cls, df):
+        """Index a dataset's Open_Intervals column, parsing Hours when the dataset predates it."""
+        if 'Open_Intervals' in df:
+            codes, uniques = pd.factorize(df['Open_Intervals'].astype(object).fillna(''), sort=False)
+            return cls(codes, uniques)
+        # Parse each distinct Hours text once
+        codes, uniques = pd.factorize(df['Hours'].astype(object).fillna(''), sort=False)
+        return cls(codes, [format_intervals(parse_hours(text)) or '' for text in uniques])
+
+    def open_values(self, start, end):
+        """Boolean mask over the distinct values with an interval overlapping [start, end)."""
+        first = np.searchsorted(self.starts, start - self.max_length, side='right')
+        last = np.searchsorted(self.starts, end, side='left')
+        found = np.zeros(len(self.known), dtype=bool)
+        found[self.owners[first:last][self.ends[first:last] > start]] = True
+        return found
+
+    def open_rows(self, rows, window):
+        """Boolean mask of the rows open during the (start, end) window; unknown hours never are."""
+        return self.open_values(*window)[self.codes[rows]]
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else "resources.csv"
+    hours = pd.read_csv(source)['Hours']
+    for text, count in hours.value_counts(dropna=False).items():
+        intervals = parse_hours(text)
+        if intervals is None:
+            shown = "unknown"
+        else:
+            shown = ', '.join(f"{DAY_NAMES[start // MINUTES_PER_DAY][:3]} {start % MINUTES_PER_DAY // 60:02d}:{start % 60:02d}"
+                              f"-{end % MINUTES_PER_DAY // 60 if end % MINUTES_PER_DAY else 24:02d}:{end % 60:02d}"
+                              for start, end in intervals)
+        print(f"{count:6d}  {text!r}: {shown}")
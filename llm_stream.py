@@ -0,0 +1,52 @@
+import json
+import re
+
+_decoder = json.JSONDecoder()
+
+
+class ResourceStreamParser:
+    """Incremental parser for the LLM's {"resources": [...], "recommendation": ...} reply.
+
+    Text is fed as it streams in; each object in the "resources" array is
+    returned as soon as it is complete, before the rest of the reply arrives.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self._position = None  # next unread offset inside the resources array
+        self._done = False
+
+    def feed(self, chunk):
+        """Add streamed text and return any newly completed resources."""
+        self.text += chunk
+        resources = []
+        if self._done:
+            return resources
+        if self._position is None:
+            match = re.search(r'"resources"\s*:\s*\[', self.text)
+            if not match:
+                return resources
+            self._position = match.end()
+
+        while True:
+            # Skip separators between array items
+            while self._position < len(self.text) and self.text[self._position] in ' \t\r\n,':
+                self._position += 1
+            if self._position >= len(self.text):
+                break
+            if self.text[self._position] == ']':
+                self._done = True
+                break
+            try:
+                value, end = _decoder.raw_decode(self.text, self._position)
+            except json.JSONDecodeError:
+                break  # item still incomplete; wait for more text
+            self._position = end
+            if isinstance(value, dict):
+                resources.append(value)
+        return resources
+
+    def finish(self):
+        """Parse the complete reply once streaming has ended."""
+        # Remove any markdown code block indicators
+        return json.loads(re.sub(r'```json|```', '', self.text).strip())
@@ -0,0 +1,297 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+from fuzzywuzzy import fuzz
+
+from bitsets import WILDCARD, AttributeBitmaps, rows_in
+from geo import GeoIndex, load_zip_centroids, resource_coordinates
+from hours import HoursIndex
+from semantic import SemanticIndex
+from service_index import ServiceIndex
+from tracing import span
+
+FUZZY_THRESHOLD = 80
+# Semantic similarity at which a resource matches even when no fuzzy variant scores above the threshold
+SEMANTIC_THRESHOLD = 0.5
+CANDIDATE_POOL = 20
+# Ranking: weighted service similarity, proximity and eligibility specificity, each in [0, 1]
+RANK_WEIGHTS = {'service': 0.6, 'distance': 0.25, 'eligibility': 0.15}
+# Distance at which proximity drops to one half
+DISTANCE_SCALE_MILES = 5.0
+COLUMNS = ['Resource_Name', 'Address', 'Services', 'Eligibility', 'Hours', 'Contact', 'ZIP_Code', 'Languages', 'Gender']
+ENCODED_COLUMNS = ['Services', 'Eligibility', 'Languages', 'Gender']
+
+
+def _encode(values):
+    """Dictionary-encode a column into integer codes and its distinct values."""
+    codes, uniques = pd.factorize(values, sort=False)
+    return codes, np.asarray(uniques, dtype=object)
+
+
+def _lower_text(column):
+    """Lowercase a text column, treating missing values as empty strings."""
+    return column.astype(object).fillna("").astype(str).str.lower()
+
+
+def dataset_fingerprint(df):
+    """Hash of the dataset's contents, independent of column order and dtypes.
+
+    Values are compared as text, so a ZIP read as an integer from the CSV
+    and the same ZIP kept as a string by generate_data.py hash alike.
+    """
+    canonical = df.reindex(columns=sorted(df.columns)).astype(object)
+    canonical = canonical.where(canonical.notna(), '').astype(str)
+    return hashlib.sha256(pd.util.hash_pandas_object(canonical, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+
+def build_indexes(df):
+    """Compute the matcher's lookup structures for a dataset.
+
+    Returns a dict with the dataset fingerprint, the ZIP -> row positions
+    groups, the dictionary-encoded lowercase filter columns, the Services
+    posting lists and the Services semantic index. The same dict can be
+    restored from a dataset snapshot.
+    """
+    # ZIP lookup: exact str(ZIP_Code).strip() value -> row positions
+    zips = df['ZIP_Code'].astype(str).str.strip().to_numpy()
+    encoded = {column: _encode(_lower_text(df[column])) for column in ENCODED_COLUMNS}
+    return {
+        # Fingerprint of the dataset contents, used to key downstream caches
+        'fingerprint': dataset_fingerprint(df),
+        'zip_groups': dict(pd.Series(zips).groupby(zips, sort=False).indices),
+        'encoded': encoded,
+        'service_postings': ServiceIndex.build(*encoded['Services']).postings,
+        'semantic': SemanticIndex.build(encoded['Services'][1]),
+    }
+
+
+class ResourceMatcher:
+    """Matching engine built once per dataset load.
+
+    Every filtered column is dictionary-encoded, so per-query string work runs
+    over the distinct values of a column instead of over every row.
+    """
+
+    def __init__(self, df, indexes=None, revision=None):
+        if 'ZIP_Code' not in df:
+            df = df.reindex(columns=COLUMNS)
+        self.df = df
+        indexes = indexes or build_indexes(df)
+        self.fingerprint = indexes['fingerprint']
+        # Dataset version for caches and /stats: the refresh revision when known, plus the fingerprint
+        # so a CSV edited outside a refresh still gets a new version
+        self.revision = revision
+        self.version = f"r{revision}-{self.fingerprint}" if revision is not None else self.fingerprint
+        self.zip_groups = indexes['zip_groups']
+        self.encoded = indexes['encoded']
+        self.service_index = ServiceIndex(indexes['service_postings'])
+        self.semantic_index = indexes['semantic']
+        # Insurance/language/gender filters are ANDs of packed row bitmaps
+        self.bitmaps = {column: AttributeBitmaps(*self.encoded[column]) for column in ('Eligibility', 'Languages', 'Gender')}
+
+        # Weekly opening intervals per distinct Open_Intervals value, for the open-hours filter
+        self.hours_index = HoursIndex.from_frame(df)
+
+        self.zip_centroids = load_zip_centroids()
+        self.geo_index = GeoIndex(*resource_coordinates(df, self.zip_centroids))
+
+    def __len__(self):
+        return len(self.df)
+
+    def zip_rows(self, zip_code):
+        """Row positions whose ZIP equals the given ZIP."""
+        return self.zip_groups.get(str(zip_code).strip(), np.empty(0, dtype=np.intp))
+
+    def eligible(self, insurance, language, gender):
+        """Packed bitmap of rows passing the insurance, language and gender filters."""
+        return (self.bitmaps['Eligibility'].matching(insurance)
+                & self.bitmaps['Languages'].matching(language)
+                & self.bitmaps['Gender'].matching(gender))
+
+    def filter_rows(self, rows, insurance, language, gender, open_during=None):
+        """Return the subset of row positions that pass the exact-match filters.
+
+        open_during, a (start, end) window in minutes of the week, keeps only
+        resources known to be open at some point in it.
+        """
+        if len(rows) == 0:
+            return rows
+        with span("filter", rows=len(rows)):
+            rows = rows[rows_in(self.eligible(insurance, language, gender), rows)]
+            if open_during is not None:
+                rows = rows[self.hours_index.open_rows(rows, open_during)]
+            return rows
+
+    def service_scores(self, variants, rows):
+        """Best fuzzy score of each row's Services against any query variant.
+
+        Scores are computed once per distinct Services text among the rows.
+        """
+        codes, uniques = self.encoded['Services']
+        row_codes = codes[rows]
+        scores = np.zeros(len(uniques), dtype=np.int16)
+        with span("fuzzy_score", rows=len(rows)) as fields:
+            distinct = np.unique(row_codes)
+            fields['distinct'] = len(distinct)
+            for code in distinct:
+                scores[code] = max(fuzz.partial_ratio(variant, uniques[code]) for variant in variants)
+        return scores[row_codes]
+
+    def semantic_scores(self, variants):
+        """Semantic similarity of each distinct Services text to the query variants, in code order.
+
+        On very large vocabularies similarities below SEMANTIC_THRESHOLD may be
+        reported as 0 (see semantic.py).
+        """
+        with span("semantic_score") as fields:
+            fields['phrases'] = self.semantic_index.phrase_count
+            return self.semantic_index.scores(variants, min_score=SEMANTIC_THRESHOLD)
+
+    def eligibility_specificity(self, insurance, rows):
+        """Share of each row's eligibility groups that name the patient's insurance.
+
+        A clinic listing only "Uninsured" is more specific to an uninsured
+        patient than one listing "Uninsured, Medicaid"; rows admitted only by
+        the "all" wildcard score 0.
+        """
+        codes, uniques = self.encoded['Eligibility']
+        value = str(insurance).strip().lower()
+        row_codes = codes[rows]
+        specificity = np.zeros(len(uniques))
+        for code in np.unique(row_codes):
+            groups = [group.strip() for group in uniques[code].split(',') if group.strip()]
+            named = sum(1 for group in groups if value and value in group and WILDCARD not in group)
+            specificity[code] = named / len(groups) if groups else 0.0
+        return specificity[row_codes]
+
+    def _match(self, rows, variants, semantic, insurance, language, gender, open_during):
+        """Rows that pass every filter and the fuzzy or semantic threshold, order kept, and their similarities.
+
+        Every filtered row is fuzzy-scored (once per distinct Services text):
+        no term index narrows them first, since partial needs such as "prim"
+        share no indexed term with the Services they fuzzy-match.
+        """
+        rows = self.filter_rows(rows, insurance, language, gender, open_during)
+        if len(rows) == 0:
+            return rows, np.empty(0)
+        scores = self.service_scores(variants, rows)
+        row_semantic = semantic[self.encoded['Services'][0][rows]]
+        keep = (scores > FUZZY_THRESHOLD) | (row_semantic >= SEMANTIC_THRESHOLD)
+        return rows[keep], np.maximum(scores / 100.0, row_semantic)[keep]
+
+    def matches(self, zip_code, needs, insurance, language, gender, radius_miles=None, k=None, open_during=None):
+        """Matching row positions with their service similarities and distances in miles.
+
+        A row matches when a query variant fuzzy-matches its Services above
+        FUZZY_THRESHOLD or its Services are semantically similar to the
+        query (SEMANTIC_THRESHOLD); the similarity is the better of the two.
+
+        By default only the given ZIP is searched, rows keep dataset order
+        and distances is None. With radius_miles and/or k, resources within
+        the radius and/or the k nearest matches to the ZIP's centroid are
+        returned nearest first. open_during restricts matches to resources
+        open during that window of the week (see filter_rows()).
+        """
+        _, variants = self.service_index.expand(needs)
+        semantic = self.semantic_scores(variants)
+        if radius_miles is None and k is None:
+            rows, scores = self._match(self.zip_rows(zip_code), variants, semantic, insurance, language, gender, open_during)
+            return rows, scores, None
+
+        origin = self.zip_centroids.get(str(zip_code).strip())
+        if origin is None:
+            return np.empty(0, dtype=np.intp), np.empty(0), np.empty(0)
+        if k is None:
+            rows, distances = self.geo_index.within(*origin, radius_miles)
+            matched, scores = self._match(rows, variants, semantic, insurance, language, gender, open_during)
+        else:
+            # Widen the neighbourhood until k resources pass the filters or it is exhausted
+            fetch = k
+            while True:
+                rows, distances = self.geo_index.nearest(*origin, fetch)
+                exhausted = len(rows) < fetch
+                if radius_miles is not None:
+                    exhausted = exhausted or len(distances) == 0 or distances[-1] > radius_miles
+                    rows, distances = rows[distances <= radius_miles], distances[distances <= radius_miles]
+                matched, scores = self._match(rows, variants, semantic, insurance, language, gender, open_during)
+                if len(matched) >= k or exhausted:
+                    break
+                fetch *= 4
+            matched, scores = matched[:k], scores[:k]
+        return matched, scores, distances[np.isin(rows, matched)]
+
+    def search(self, zip_code, needs, insurance, language, gender, radius_miles=None, k=None, open_during=None):
+        """Return every matching resource, in the order of matches().
+
+        Geographic searches add a Distance_Miles column.
+        """
+        rows, _, distances = self.matches(zip_code, needs, insurance, language, gender, radius_miles, k, open_during)
+        if len(rows) == 0:
+            return pd.DataFrame()
+        if distances is None:
+            return self.df.iloc[rows]
+        return self.df.iloc[rows].assign(Distance_Miles=distances.round(1))
+
+    def ranked(self, zip_code, needs, insurance, language, gender, radius_miles=None, k=None, limit=None, offset=0,
+               open_during=None):
+        """One page of matching resources, best first, and the total number of matches.
+
+        Matches are scored on service similarity (see matches()), proximity to the ZIP's
+        centroid and eligibility specificity (RANK_WEIGHTS), and returned
+        with a Score column. Only the offset + limit best are selected, with
+        np.argpartition, and sorted; limit=None returns every match.
+        """
+        rows, scores, distances = self.matches(zip_code, needs, insurance, language, gender, radius_miles, k, open_during)
+        total = len(rows)
+        if total == 0 or offset >= total:
+            return pd.DataFrame(), total
+        with span("rank", rows=total):
+            proximity = 1.0 / (1.0 + distances / DISTANCE_SCALE_MILES) if distances is not None else np.ones(total)
+            rank = (RANK_WEIGHTS['service'] * scores
+                    + RANK_WEIGHTS['distance'] * proximity
+                    + RANK_WEIGHTS['eligibility'] * self.eligibility_specificity(insurance, rows))
+            end = total if limit is None else min(offset + limit, total)
+            if end < total:
+                cutoff = rank[np.argpartition(-rank, end - 1)[end - 1]]
+                # Rows tied at the cutoff are taken in match order, so consecutive pages never overlap
+                above = np.flatnonzero(rank > cutoff)
+                top = np.concatenate([above, np.flatnonzero(rank == cutoff)[:end - len(above)]])
+            else:
+                top = np.arange(total)
+            top = top[np.lexsort((top, -rank[top]))][offset:end]
+        page = self.df.iloc[rows[top]]
+        if distances is not None:
+            page = page.assign(Distance_Miles=distances[top].round(1))
+        return page.assign(Score=rank[top].round(3)), total
+
+    def candidates(self, zip_code, needs, insurance, language, gender, k, open_during=None):
+        """Top-k eligible resources near the ZIP, ranked by service similarity.
+
+        Used to narrow the LLM prompt: the k * CANDIDATE_POOL nearest resources
+        (or the ZIP's own rows when it has no centroid) are filtered on
+        eligibility, language, gender and open_during, then ordered by service similarity,
+        the better of the fuzzy score and the semantic similarity, with
+        distance breaking ties.
+        """
+        _, variants = self.service_index.expand(needs)
+        origin = self.zip_centroids.get(str(zip_code).strip())
+        if origin is not None:
+            rows, distances = self.geo_index.nearest(*origin, k * CANDIDATE_POOL)
+        else:
+            rows = self.zip_rows(zip_code)
+            distances = np.zeros(len(rows))
+        keep = np.isin(rows, self.filter_rows(rows, insurance, language, gender, open_during))
+        rows, distances = rows[keep], distances[keep]
+        if len(rows) == 0:
+            return self.df.iloc[rows]
+        semantic = self.semantic_scores(variants)[self.encoded['Services'][0][rows]]
+        similarity = np.maximum(self.service_scores(variants, rows) / 100.0, semantic)
+        top = np.lexsort((distances, -similarity))[:k]
+        return self.df.iloc[rows[top]]
+
+
+def search_resources(data, zip_code, needs, insurance, language, gender, radius_miles=None, k=None, open_during=None):
+    """Fuzzy-match resources; accepts a DataFrame or a prebuilt ResourceMatcher."""
+    matcher = data if isinstance(data, ResourceMatcher) else ResourceMatcher(data)
+    return matcher.search(zip_code, needs, insurance, language, gender, radius_miles=radius_miles, k=k, open_during=open_during)
@@ -0,0 +1,73 @@
+PROMPT_COLUMNS = ['Resource_Name', 'Address', 'Services', 'Eligibility', 'Hours', 'Contact', 'ZIP_Code', 'Languages', 'Gender']
+CHARS_PER_TOKEN = 4
+
+PROMPT_TEMPLATE = """
+    You are a health resource navigator for uninsured patients in Austin, TX.
+    Given the following patient inputs:
+    - ZIP Code: {zip_code}
+    - Medical Needs: {needs}
+    - Insurance Status: {insurance}
+    - Preferred Language: {language}
+    - Gender-Specific Services: {gender}
+
+    Filter the following resources (one per line, fields separated by "|") to find matching clinics. If no matches are found, generate up to 3 plausible resources in Austin, TX, that fit the criteria, ensuring realistic details (e.g., addresses in Austin, valid ZIP codes like 78701, 78702).
+
+    Your response MUST be ONLY valid JSON in the exact format specified below, with no additional text, explanations, or markdown formatting.
+
+    Resources:
+{resources}
+
+    REQUIRED OUTPUT FORMAT:
+    {{
+        "resources": [
+            {{
+                "Resource_Name": "...",
+                "Address": "...",
+                "Services": "...",
+                "Eligibility": "...",
+                "Hours": "...",
+                "Contact": "...",
+                "ZIP_Code": "...",
+                "Languages": "...",
+                "Gender": "..."
+            }}
+        ],
+        "recommendation": "..."
+    }}
+
+    The recommendation should be 50-100 words suggesting next steps or considerations for the patient.
+    """
+
+
+def estimate_tokens(text):
+    """Rough token count for budgeting (about four characters per token)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def serialize_row(row):
+    """Compact one-line form of a resource: prompt columns joined by '|'."""
+    return '|'.join(str(row[column]).replace('|', '/').replace('\n', ' ') for column in PROMPT_COLUMNS)
+
+
+def build_prompt(candidates, zip_code, needs, insurance, language, gender, token_budget):
+    """Build the LLM prompt from ranked candidates within a token budget.
+
+    Rows are added best-first until the next one would take the prompt's
+    estimate over the budget. Returns the prompt, the number of rows
+    included and its estimated tokens.
+    """
+    fields = dict(zip_code=zip_code, needs=needs, insurance=insurance, language=language, gender=gender)
+    header = '|'.join(PROMPT_COLUMNS)
+    # Count characters rather than summing per-row estimates, which would round up once per row
+    length = len(PROMPT_TEMPLATE.format(resources=header, **fields))
+    lines = [header]
+    for _, row in candidates.iterrows():
+        line = serialize_row(row)
+        added = length + 1 + len(line)
+        # estimate_tokens() of the prompt with this row
+        if added // CHARS_PER_TOKEN + 1 > token_budget:
+            break
+        lines.append(line)
+        length = added
+    prompt = PROMPT_TEMPLATE.format(resources='\n'.join(lines), **fields)
+    return prompt, len(lines) - 1, estimate_tokens(prompt)
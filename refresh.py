@@ -0,0 +1,142 @@
+"""Incremental dataset refresh: per-source state, keyed merge and change log.
+
+The refresh state records, for each scraped source, its HTTP validators,
+content hash and the resources it produced last time, along with the
+dataset revision number. Unchanged or failed sources reuse their stored
+resources, the rebuilt list is merged into the existing dataset by a
+stable resource key, and every added, updated or removed record is
+appended to a JSON-lines change log under the new revision.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+STATE_FORMAT = 1
+
+
+def resource_key(resource):
+    """Stable key for a resource: its name and address, case- and whitespace-insensitive."""
+    parts = [re.sub(r'\s+', ' ', str(resource.get(field, ''))).strip().casefold() for field in ('Resource_Name', 'Address')]
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def state_path_for(csv_path):
+    """Refresh state file that accompanies a resources CSV."""
+    return os.path.splitext(csv_path)[0] + '.state.json'
+
+
+def dataset_revision(csv_path):
+    """Revision number of a resources CSV from its refresh state, or None if it was never refreshed."""
+    path = state_path_for(csv_path)
+    if not os.path.exists(path):
+        return None
+    return load_state(path)['revision'] or None
+
+
+def load_state(path):
+    """Refresh state from the last run, or an empty state at revision 0."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('format') == STATE_FORMAT:
+            return state
+        logger.warning(f"Ignoring refresh state {path} with unsupported format {state.get('format')}")
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read refresh state {path}: {e}")
+    return {'format': STATE_FORMAT, 'revision': 0, 'sources': {}}
+
+
+def replace_file(path, write):
+    """Write a file through write(staging_path), then rename it over path.
+
+    Readers (such as the search service's reloader) see either the old file
+    or the complete new one, never a partial write.
+    """
+    staging = path + '.tmp'
+    write(staging)
+    os.replace(staging, path)
+
+
+def _write_json(value, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, indent=4)
+
+
+def save_state(state, path):
+    """Write the state atomically so an interrupted run leaves the previous one intact."""
+    replace_file(path, lambda staging: _write_json(state, staging))
+
+
+def update_sources(state, results):
+    """Fold scrape results into state and return every source's current resources.
+
+    Changed sources store their new resources; unchanged and failed
+    sources keep the resources from their last successful scrape, so a
+    transient failure does not drop a source's records.
+    """
+    resources = []
+    for name, result in results.items():
+        previous = state['sources'].get(name, {})
+        entry = {key: result[key] for key in ('etag', 'last_modified', 'content_hash')}
+        entry['resources'] = result['resources'] if result['status'] == 'changed' else previous.get('resources', [])
+        entry['checked'] = time.time()
+        entry['changed'] = time.time() if result['status'] == 'changed' else previous.get('changed')
+        state['sources'][name] = entry
+        # Copies, so later cleanup steps do not modify the stored records
+        resources.extend(dict(resource) for resource in entry['resources'])
+    return resources
+
+
+def load_resources(csv_path):
+    """Existing dataset as a list of dicts, or an empty list when there is none."""
+    if not os.path.exists(csv_path):
+        return []
+    df = pd.read_csv(csv_path, dtype={'ZIP_Code': str, 'Contact': str})
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def merge_resources(existing, current):
+    """Merge the rebuilt resource list into the existing dataset by resource key.
+
+    Existing records keep their position (updated in place or removed) and
+    new records are appended, so unchanged rows stay where downstream
+    indexes expect them. Returns (merged, changes).
+    """
+    current_by_key = {resource_key(resource): resource for resource in current}
+    merged, changes, seen = [], [], set()
+    for resource in existing:
+        key = resource_key(resource)
+        if key in seen:
+            continue
+        seen.add(key)
+        new = current_by_key.get(key)
+        if new is None:
+            changes.append({'change': 'removed', 'key': key, 'resource': resource})
+            continue
+        fields = sorted(field for field in set(resource) | set(new) if resource.get(field) != new.get(field))
+        if fields:
+            changes.append({'change': 'updated', 'key': key, 'fields': fields, 'resource': new})
+        merged.append(new)
+    for key, resource in current_by_key.items():
+        if key not in seen:
+            seen.add(key)
+            changes.append({'change': 'added', 'key': key, 'resource': resource})
+            merged.append(resource)
+    return merged, changes
+
+
+def append_changes(path, revision, changes):
+    """Append one JSON line per change, tagged with the revision that introduced it."""
+    timestamp = time.time()
+    with open(path, 'a', encoding='utf-8') as f:
+        for change in changes:
+            f.write(json.dumps({'revision': revision, 'time': timestamp, **change}) + '\n')
@@ -0,0 +1,291 @@
+"""Scraper framework: source registry, HTTP and browser fetching, rate limits.
+
+Sources register a parse function with @register_source. scrape_sources()
+fetches every registered page concurrently, spacing requests to the same
+domain instead of sleeping blindly. Static sources are fetched over a
+pooled keep-alive HTTP session and only fall back to the bounded pool of
+reusable browser sessions when their listings are missing from the raw
+HTML (i.e. rendered by JavaScript). Browser pages are waited on for
+readiness rather than fixed delays.
+
+Given the previous run's per-source state, refresh_sources() sends
+conditional requests (ETag/Last-Modified) and compares content hashes,
+so pages that have not changed are not parsed again.
+"""
+import hashlib
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from urllib3.util.retry import Retry
+
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+logger = logging.getLogger(__name__)
+
+PAGE_TIMEOUT = 20
+HTTP_TIMEOUT = 20
+SCROLL_SETTLE = 1.0
+MAX_SCROLLS = 5
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.7049.95 Safari/537.36"
+
+# Registered sources, in registration order
+SOURCES = {}
+
+
+class Source:
+    """A scrapeable page and the function that turns it into resources."""
+
+    def __init__(self, name, url, parse, ready_selector='body', min_interval=5.0, fetch='browser', parse_only=None):
+        if fetch not in ('static', 'browser'):
+            raise ValueError(f"Unknown fetch mode '{fetch}' for source {name}")
+        self.name = name
+        self.url = url
+        self.parse = parse
+        self.ready_selector = ready_selector
+        self.min_interval = min_interval
+        self.fetch = fetch
+        self.parse_only = parse_only
+
+
+def register_source(name, url, ready_selector='body', min_interval=5.0, fetch='browser', parse_only=None):
+    """Register a parse(soup) -> list of resources function as a source.
+
+    ready_selector is the CSS selector whose presence means listings have
+    rendered; min_interval is the minimum spacing in seconds between
+    requests to the source's domain. fetch='static' fetches the page over
+    HTTP and uses the browser only if ready_selector is missing from it.
+    parse_only is an optional SoupStrainer limiting the parsed tree to the
+    listing elements, which skips building nodes for page boilerplate.
+    """
+    def decorator(parse):
+        SOURCES[name] = Source(name, url, parse, ready_selector, min_interval, fetch, parse_only)
+        return parse
+    return decorator
+
+
+class RateLimiter:
+    """Enforces a minimum interval between requests to the same domain."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, domain, interval):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class DriverPool:
+    """Bounded pool of reusable WebDriver sessions.
+
+    Sessions are created lazily by factory (which may return None on
+    failure) and returned to the pool after use; a session that raised is
+    discarded rather than reused.
+    """
+
+    def __init__(self, factory, size=2):
+        self._factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def session(self):
+        with self._slots:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._factory() if self._factory else None
+            if driver is None:
+                raise RuntimeError("Could not start a WebDriver session")
+            try:
+                yield driver
+            except Exception:
+                driver.quit()
+                raise
+            self._idle.put(driver)
+
+    def close(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                driver.quit()
+            except Exception as e:
+                logger.error(f"Error closing WebDriver session: {str(e)}")
+
+
+def http_session(pool_size=4):
+    """HTTP session with pooled keep-alive connections, compression and retries."""
+    session = requests.Session()
+    retries = Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip, deflate'})
+    return session
+
+
+def fetch_static(session, url, previous=None):
+    """Conditionally GET a page, revalidating with the previous run's ETag/Last-Modified.
+
+    Returns the response, whose status is 304 when the page is unchanged.
+    """
+    previous = previous or {}
+    headers = {}
+    if previous.get('etag'):
+        headers['If-None-Match'] = previous['etag']
+    if previous.get('last_modified'):
+        headers['If-Modified-Since'] = previous['last_modified']
+    response = session.get(url, headers=headers, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    return response
+
+
+def parse_page(content, source):
+    """Parse page bytes or text; None when the source's listings are not in it."""
+    # Raw bytes let the parser detect the document encoding itself
+    soup = BeautifulSoup(content, PARSER, parse_only=source.parse_only)
+    return soup if soup.select_one(source.ready_selector) is not None else None
+
+
+def content_hash(content):
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def wait_until_ready(driver, selector, timeout=PAGE_TIMEOUT):
+    """Wait for the document and listings to load, then scroll until the page stops growing."""
+    WebDriverWait(driver, timeout).until(lambda d: d.execute_script("return document.readyState") == "complete")
+    try:
+        WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+    except TimeoutException:
+        logger.warning(f"No elements matching '{selector}' after {timeout}s at {driver.current_url}")
+
+    # Lazy-loaded listings extend the page after a scroll; stop once the height settles
+    height = driver.execute_script("return document.body.scrollHeight")
+    for _ in range(MAX_SCROLLS):
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        try:
+            WebDriverWait(driver, SCROLL_SETTLE, poll_frequency=0.1).until(
+                lambda d: d.execute_script("return document.body.scrollHeight") > height)
+        except TimeoutException:
+            break
+        height = driver.execute_script("return document.body.scrollHeight")
+
+
+def fetch_browser(pool, url, ready_selector):
+    """Render a page in a pooled browser session and return its HTML."""
+    with pool.session() as driver:
+        driver.get(url)
+        wait_until_ready(driver, ready_selector)
+        return driver.page_source
+
+
+def scrape_source(source, pool, session, limiter, url=None, previous=None):
+    """Fetch and parse one source, skipping the parse if the page is unchanged.
+
+    previous is the source's entry from the last run's state (validators and
+    content hash). Returns a dict with status 'changed', 'unchanged' or
+    'failed', the new validators and hash, and the parsed resources when
+    changed. Errors are logged rather than raised.
+    """
+    previous = previous or {}
+    url = url or source.url
+    domain = urlparse(url).netloc
+    result = {'status': 'failed', 'resources': [], 'etag': previous.get('etag'),
+              'last_modified': previous.get('last_modified'), 'content_hash': previous.get('content_hash')}
+    try:
+        soup = None
+        if source.fetch == 'static':
+            limiter.wait(domain, source.min_interval)
+            logger.info(f"Fetching {source.name}: {url}")
+            try:
+                response = fetch_static(session, url, previous)
+                if response.status_code == 304:
+                    logger.info(f"{source.name} not modified")
+                    return {**result, 'status': 'unchanged'}
+                digest = content_hash(response.content)
+                result.update(etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'))
+                if digest == previous.get('content_hash'):
+                    logger.info(f"{source.name} content unchanged")
+                    return {**result, 'status': 'unchanged'}
+                soup = parse_page(response.content, source)
+                if soup is None:
+                    logger.info(f"No '{source.ready_selector}' in static HTML for {source.name}; falling back to browser")
+            except requests.RequestException as e:
+                logger.warning(f"HTTP fetch failed for {source.name}: {str(e)}; falling back to browser")
+        if soup is None:
+            # Validators of the raw HTML say nothing about what JavaScript renders
+            result.update(etag=None, last_modified=None)
+            limiter.wait(domain, source.min_interval)
+            logger.info(f"Scraping {source.name} in browser: {url}")
+            page_source = fetch_browser(pool, url, source.ready_selector)
+            digest = content_hash(page_source)
+            if digest == previous.get('content_hash'):
+                logger.info(f"{source.name} content unchanged")
+                return {**result, 'status': 'unchanged'}
+            soup = BeautifulSoup(page_source, PARSER, parse_only=source.parse_only)
+        return {**result, 'status': 'changed', 'resources': source.parse(soup), 'content_hash': digest}
+    except Exception as e:
+        logger.error(f"Error scraping {source.name}: {str(e)}")
+        return result
+
+
+def refresh_sources(driver_factory=None, state=None, names=None, pool_size=2, urls=None):
+    """Scrape registered sources concurrently, skipping pages unchanged since state.
+
+    state maps source names to the entries returned by the previous run
+    (see scrape_source); returns a dict of fresh entries in registration
+    order. driver_factory creates browser sessions for browser sources and
+    static fallbacks (None means HTTP only). urls maps source names to
+    replacement URLs (e.g. local fixtures).
+    """
+    selected = [SOURCES[name] for name in (names or SOURCES)]
+    state = state or {}
+    urls = urls or {}
+    pool = DriverPool(driver_factory, pool_size)
+    session = http_session(max(len(selected), 1))
+    limiter = RateLimiter()
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(len(selected), 1)) as executor:
+            futures = {source.name: executor.submit(scrape_source, source, pool, session, limiter,
+                                                    urls.get(source.name), state.get(source.name))
+                       for source in selected}
+            results = {name: future.result() for name, future in futures.items()}
+    finally:
+        pool.close()
+        session.close()
+    statuses = [result['status'] for result in results.values()]
+    logger.info(f"Scraped {len(selected)} sources in {time.perf_counter() - start:.1f}s "
+                f"({statuses.count('changed')} changed, {statuses.count('unchanged')} unchanged, {statuses.count('failed')} failed)")
+    return results
+
+
+def scrape_sources(driver_factory=None, names=None, pool_size=2, urls=None):
+    """Scrape registered sources and return all their resources in registration order."""
+    results = refresh_sources(driver_factory, None, names, pool_size, urls)
+    return [resource for result in results.values() for resource in result['resources']]
@@ -0,0 +1,214 @@
+"""Search core shared by the search service, batch triage and the benchmarks.
+
+Holds the dataset (reloaded when generate_data.py writes a new version),
+runs the fuzzy search for query dicts and implements the AI search steps:
+candidate selection, prompt building and the streamed OpenAI call. Nothing
+here depends on Streamlit.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import openai
+import pandas as pd
+from dotenv import load_dotenv
+
+from hours import query_window
+from llm_stream import ResourceStreamParser
+from matcher import ResourceMatcher
+from prompting import build_prompt
+from snapshot import open_matcher, snapshot_path_for
+from tracing import event, span
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DATASET_PATH = os.getenv("DATASET_PATH", "resources.csv")
+# Seconds between checks for a new dataset version
+DATASET_RELOAD_INTERVAL = float(os.getenv("DATASET_RELOAD_INTERVAL", "2"))
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# LLM call limits: client timeout per request and how long a search waits before giving up on the AI results
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "15"))
+
+# Retrieval settings for the LLM prompt
+LLM_TOP_K = int(os.getenv("LLM_TOP_K", "25"))
+LLM_TOKEN_BUDGET = int(os.getenv("LLM_TOKEN_BUDGET", "3000"))
+
+# LLM response cache settings
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+# Missing filters match every resource (an empty string is a substring of any value)
+QUERY_DEFAULTS = {'insurance': '', 'language': '', 'gender': ''}
+SEARCH_FIELDS = ('zip_code', 'needs', 'insurance', 'language', 'gender')
+# Time zone of the resources' opening hours, for "open now"
+HOURS_TIMEZONE = os.getenv("HOURS_TIMEZONE", "America/Chicago")
+
+
+def dataset_signature(csv_path):
+    """Modification times of the CSV and its snapshot manifest; None for a missing file."""
+    paths = (csv_path, os.path.join(snapshot_path_for(csv_path), 'manifest.json'))
+    return tuple(os.stat(path).st_mtime_ns if os.path.exists(path) else None for path in paths)
+
+
+class Dataset:
+    """The matcher for the current version of a dataset.
+
+    generate_data.py replaces the CSV and snapshot with renames, so a new
+    modification time on either means a new version. The files are checked
+    at most every reload_interval seconds, and a dataset that fails to load
+    leaves the previous one in service.
+    """
+
+    def __init__(self, csv_path=DATASET_PATH, reload_interval=DATASET_RELOAD_INTERVAL):
+        self.csv_path = csv_path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._matcher = None
+        self._signature = None
+        self._checked = 0.0
+
+    def matcher(self):
+        if self._matcher is not None and time.monotonic() - self._checked < self.reload_interval:
+            return self._matcher
+        with self._lock:
+            if self._matcher is None or time.monotonic() - self._checked >= self.reload_interval:
+                signature = dataset_signature(self.csv_path)
+                if self._matcher is None or signature != self._signature:
+                    self._load(signature)
+                self._checked = time.monotonic()
+        return self._matcher
+
+    def _load(self, signature):
+        try:
+            with span("data_load") as fields:
+                matcher = open_matcher(self.csv_path)
+                fields['rows'] = len(matcher)
+        except Exception as e:
+            if self._matcher is not None:
+                logger.error(f"Could not reload {self.csv_path}: {str(e)}; keeping dataset {self._matcher.version}")
+                return
+            logger.error(f"Could not load {self.csv_path}: {str(e)}. Please run generate_data.py first.")
+            matcher = ResourceMatcher(pd.DataFrame())
+        if self._matcher is not None:
+            logger.info(f"Reloaded {self.csv_path}: dataset {self._matcher.version} -> {matcher.version}, {len(matcher)} resources")
+        self._matcher, self._signature = matcher, signature
+
+
+def _optional_number(value, kind):
+    return kind(value) if value not in (None, '') else None
+
+
+def _flag(value):
+    # Batch CSV input gives flags as text
+    return str(value).strip().lower() in ('true', '1', 'yes') if isinstance(value, str) else bool(value)
+
+
+def parse_query(query):
+    """Search arguments from a query dict; raises ValueError for malformed or out-of-range numbers, days or times.
+
+    open_now, or open_day with an optional open_after time, become
+    open_during: the window of the week a resource must be open in.
+    """
+    fields = {**QUERY_DEFAULTS, **{name: value for name, value in query.items() if value is not None}}
+    parsed = {name: str(fields.get(name, '')) for name in SEARCH_FIELDS}
+    parsed['radius_miles'] = _optional_number(fields.get('radius_miles'), float)
+    parsed['k'] = _optional_number(fields.get('k'), int)
+    parsed['limit'] = _optional_number(fields.get('limit'), int)
+    parsed['offset'] = _optional_number(fields.get('offset'), int) or 0
+    if (parsed['limit'] is not None and parsed['limit'] < 1) or parsed['offset'] < 0:
+        raise ValueError("limit must be positive and offset not negative")
+    if (parsed['k'] is not None and parsed['k'] < 1) or (parsed['radius_miles'] is not None and not parsed['radius_miles'] >= 0):
+        raise ValueError("k must be positive and radius_miles not negative")
+    parsed['open_during'] = query_window(_flag(fields.get('open_now')), fields.get('open_day'), fields.get('open_after'),
+                                         now=datetime.now(ZoneInfo(HOURS_TIMEZONE)))
+    return parsed
+
+
+def _records(df):
+    return json.loads(df.to_json(orient='records')) if not df.empty else []
+
+
+def run_query(matcher, query):
+    """Search one query and return it with its results as a JSON-ready dict.
+
+    Results are ranked best first; the optional limit and offset fields
+    select one page of them, and total counts every match.
+    """
+    fields = parse_query(query)
+    page, total = matcher.ranked(*(fields[name] for name in SEARCH_FIELDS), radius_miles=fields['radius_miles'],
+                                 k=fields['k'], limit=fields['limit'], offset=fields['offset'],
+                                 open_during=fields['open_during'])
+    records = _records(page)
+    return {'query': query, 'count': len(records), 'total': total, 'results': records}
+
+
+def candidate_records(matcher, query, k=LLM_TOP_K):
+    """The top-k local candidates for the AI search prompt, as JSON-ready dicts."""
+    fields = parse_query(query)
+    return _records(matcher.candidates(*(fields[name] for name in SEARCH_FIELDS), k, open_during=fields['open_during']))
+
+
+def openai_client():
+    """OpenAI client for the AI search, or None when OPENAI_API_KEY is not set.
+
+    OPENAI_BASE_URL can point it at any OpenAI-compatible server.
+    """
+    if not OPENAI_API_KEY:
+        return None
+    return openai.OpenAI(api_key=OPENAI_API_KEY, timeout=LLM_TIMEOUT)
+
+
+def build_llm_prompt(candidates, zip_code, needs, insurance, language, gender, token_budget=LLM_TOKEN_BUDGET):
+    """Prompt for the candidates DataFrame; returns (prompt, rows included, estimated tokens)."""
+    with span("prompt_build") as fields:
+        prompt, prompt_rows, prompt_tokens = build_prompt(candidates, zip_code, needs, insurance, language, gender, token_budget)
+        fields.update(candidates=len(candidates), rows=prompt_rows, tokens=prompt_tokens)
+    logger.info(f"LLM prompt: {len(prompt)} chars, ~{prompt_tokens} tokens, {prompt_rows} of {len(candidates)} candidates")
+    return prompt, prompt_rows, prompt_tokens
+
+
+def ask_llm(client, prompt, on_resource=None):
+    """Stream the OpenAI reply to a prompt and parse its JSON.
+
+    on_resource is called with each resource as soon as its JSON object is
+    complete.
+    """
+    parser = ResourceStreamParser()
+    with span("llm_call") as fields:
+        start = time.perf_counter()
+        stream = client.chat.completions.create(
+            model="gpt-3.5-turbo",  # Use "gpt-4" if available in your plan
+            messages=[
+                {"role": "system", "content": "You are a healthcare resource navigator assistant that returns only valid JSON. Your responses must contain nothing but properly formatted JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=2500,
+            temperature=0.5,
+            stream=True
+        )
+
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                if "first_token_ms" not in fields:
+                    fields["first_token_ms"] = round(1000 * (time.perf_counter() - start), 1)
+                for resource in parser.feed(delta):
+                    if on_resource:
+                        on_resource(resource)
+        fields["chars"] = len(parser.text)
+
+    # Log raw output for debugging
+    event("llm_response", text=parser.text)
+
+    with span("json_parse"):
+        return parser.finish()
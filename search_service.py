@@ -0,0 +1,297 @@
+"""Headless search service: the fuzzy and AI searches over HTTP/JSON.
+
+    python search_service.py --port 8502 --workers 4
+
+Searches run in a pool of worker processes. Each worker loads the dataset
+once (from the shared memory-mapped snapshot when one is current) and
+reloads it when generate_data.py writes a new version. For AI searches a
+worker returns the local results and the prompt candidates in one trip;
+the request thread then streams the cached, coalesced OpenAI call.
+
+    POST /search       query JSON -> {"query", "count", "total", "results", "version"}
+    POST /search/llm   query JSON -> JSON lines: {"local": <as /search>}, then
+                       {"resource": ...} as each streams in, then
+                       {"resources": [...], "recommendation": ...} or {"error": ...}
+    GET  /stats        dataset version and revision, AI cache counters and stage timings
+    GET  /metrics      stage latency histograms in Prometheus text format
+    GET  /health
+
+Query fields are those of batch.py: zip_code, needs and optionally
+insurance, language, gender, radius_miles, k, limit and offset to select
+one page of the ranked results, and open_now or open_day / open_after to
+keep only resources open then.
+"""
+import argparse
+import contextvars
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+import tracing
+from llm_cache import LLMCache
+from prompting import PROMPT_COLUMNS
+from search import (DATASET_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_DEADLINE, SEARCH_FIELDS,
+                    Dataset, ask_llm, build_llm_prompt, candidate_records, openai_client, parse_query, run_query)
+from tracing import collect, event, replay, trace
+
+logger = logging.getLogger(__name__)
+
+SEARCH_SERVICE_HOST = os.getenv("SEARCH_SERVICE_HOST", "127.0.0.1")
+SEARCH_SERVICE_PORT = int(os.getenv("SEARCH_SERVICE_PORT", "8502"))
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", str(os.cpu_count() or 1)))
+LLM_THREADS = 8
+
+# Dataset held by this worker process
+_dataset = None
+
+
+def _init_worker(csv_path, load_spans=None):
+    """Load the worker's dataset; returns the load's spans and also puts them on the load_spans queue if given.
+
+    The spans are collected like those of reloads in _run_task, since a
+    spawned worker has no trace log of its own; the service records them.
+    """
+    global _dataset
+    # Spawned workers start without the service's logging setup
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    with collect() as spans:
+        _dataset = Dataset(csv_path)
+        _dataset.matcher()
+    if load_spans is not None:
+        load_spans.put(spans)
+    return spans
+
+
+def _run_task(kind, query):
+    """Worker side of a search: 'search' returns the local results, 'llm' adds the prompt candidates.
+
+    Spans are collected and returned so the service records them under the request's trace.
+    """
+    with collect() as spans:
+        matcher = _dataset.matcher()
+        result = run_query(matcher, query)
+        if kind == 'llm':
+            result['candidates'] = candidate_records(matcher, query)
+    return {**result, 'version': matcher.version, 'revision': matcher.revision, 'rows': len(matcher), 'spans': spans}
+
+
+class SearchService:
+    """Dispatches searches to the worker pool and runs the AI search calls.
+
+    With workers=1 searches run in the service process itself.
+    """
+
+    def __init__(self, csv_path=DATASET_PATH, workers=SEARCH_WORKERS):
+        if workers > 1:
+            # Fresh interpreters: fork would copy the parent's logging and HTTP threads in an unknown state
+            context = multiprocessing.get_context('spawn')
+            load_spans = context.Queue()
+            self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                             initializer=_init_worker, initargs=(csv_path, load_spans))
+            # Start every worker now, so no search waits for a process to start and load the dataset
+            for future in [self._pool.submit(os.getpid) for _ in range(workers)]:
+                future.result()
+            for _ in range(workers):
+                replay(load_spans.get())
+        else:
+            self._pool = None
+            replay(_init_worker(csv_path))
+        self.workers = workers
+        self.client = openai_client()
+        self.cache = LLMCache(LLM_CACHE_PATH, ttl_seconds=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES)
+        self.llm_executor = ThreadPoolExecutor(max_workers=LLM_THREADS, thread_name_prefix="llm")
+        self.dataset = {'version': None, 'revision': None, 'rows': None}
+
+    def _run(self, kind, query):
+        if self._pool is None:
+            result = _run_task(kind, query)
+        else:
+            result = self._pool.submit(_run_task, kind, query).result()
+        replay(result.pop('spans'))
+        # Workers reload independently; report the version that served the latest search
+        self.dataset = {'version': result['version'], 'revision': result.pop('revision'), 'rows': result.pop('rows')}
+        return result
+
+    def search(self, query):
+        """Fuzzy search; the response is batch.py's result dict plus the dataset version."""
+        with trace("search", mode="fuzzy"):
+            return self._run('search', query)
+
+    def search_llm(self, query):
+        """Yield the AI search's events: local results, streamed resources, then the reply or an error.
+
+        The LLM call runs in the background and keeps filling the cache if
+        the deadline passes or the client disconnects.
+        """
+        with trace("search", mode="llm"):
+            try:
+                result = self._run('llm', query)
+                candidates = pd.DataFrame.from_records(result.pop('candidates'), columns=PROMPT_COLUMNS)
+                yield {'local': result}
+                if self.client is None:
+                    raise RuntimeError("AI search is not configured (OPENAI_API_KEY is not set)")
+
+                fields = parse_query(query)
+                values = [fields[name] for name in SEARCH_FIELDS]
+                # Identical inputs against the same dataset share one cached (or in-flight) LLM call
+                window = fields['open_during']
+                key = self.cache.make_key(result['version'], open_during='-'.join(map(str, window)) if window else '',
+                                          **{name: fields[name] for name in SEARCH_FIELDS})
+                updates = queue.Queue()
+
+                def compute():
+                    prompt, _, _ = build_llm_prompt(candidates, *values)
+                    return ask_llm(self.client, prompt, on_resource=updates.put)
+
+                # Run in a copy of this context so the LLM stages are logged under the request's trace
+                future = self.llm_executor.submit(contextvars.copy_context().run, self.cache.get_or_compute, key, compute)
+                deadline = time.monotonic() + LLM_DEADLINE
+                while not (future.done() and updates.empty()):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"no response within {LLM_DEADLINE:g}s")
+                    try:
+                        yield {'resource': updates.get(timeout=min(remaining, 0.1))}
+                    except queue.Empty:
+                        continue
+                parsed = future.result()
+                yield {'resources': parsed.get("resources", []),
+                       'recommendation': parsed.get("recommendation", "No recommendation provided.")}
+            except Exception as e:
+                # The raw output (if any) is in the llm_response event of the trace log
+                event("llm_error", error=str(e))
+                yield {'error': str(e)}
+
+    def stats(self):
+        return {**self.dataset, 'workers': self.workers, 'llm_enabled': self.client is not None,
+                'cache': self.cache.stats(), 'stages': tracing.stage_summary()}
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+        self.llm_executor.shutdown(wait=False, cancel_futures=True)
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the UI's pooled session reuses its connection
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _send(self, status, body, content_type="application/json"):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status, value):
+        self._send(status, json.dumps(value))
+
+    def _write_chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _read_query(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        query = json.loads(self.rfile.read(length) or b'{}')
+        if not isinstance(query, dict):
+            raise ValueError("expected a JSON object")
+        parse_query(query)
+        return query
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/stats':
+            self._send_json(200, service.stats())
+        elif self.path == '/metrics':
+            self._send(200, tracing.metrics_text(), "text/plain; version=0.0.4")
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        service = self.server.service
+        if self.path not in ('/search', '/search/llm'):
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        try:
+            query = self._read_query()
+        except ValueError as e:
+            self._send_json(400, {'error': f"Invalid query: {str(e)}"})
+            return
+
+        if self.path == '/search':
+            try:
+                result = service.search(query)
+            except Exception as e:
+                logger.error(f"Search failed for {query}: {str(e)}")
+                self._send_json(500, {'error': str(e)})
+                return
+            self._send_json(200, result)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        events = service.search_llm(query)
+        try:
+            for item in events:
+                self._write_chunk(json.dumps(item) + '\n')
+            self._write_chunk('')
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info(f"Client disconnected during AI search for {query}")
+            self.close_connection = True
+        finally:
+            events.close()
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(host=SEARCH_SERVICE_HOST, port=SEARCH_SERVICE_PORT, csv_path=DATASET_PATH, workers=SEARCH_WORKERS):
+    """Run the service until interrupted or terminated."""
+    # Stop on SIGTERM as on Ctrl-C, so the worker processes are shut down rather than left running
+    signal.signal(signal.SIGTERM, _interrupt)
+    tracing.configure()
+    service = SearchService(csv_path, workers)
+    server = ThreadingHTTPServer((host, port), SearchHandler)
+    server.service = service
+    logger.info(f"Search service for {csv_path} on http://{host}:{server.server_port} with {workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve resource searches over HTTP/JSON.")
+    parser.add_argument("--host", default=SEARCH_SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SEARCH_SERVICE_PORT)
+    parser.add_argument("--dataset", default=DATASET_PATH, help="resources CSV to search (its .snapshot is used when current)")
+    parser.add_argument("--workers", type=int, default=SEARCH_WORKERS, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    serve(args.host, args.port, args.dataset, args.workers)
+
+
+if __name__ == "__main__":
+    main()
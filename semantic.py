@@ -0,0 +1,204 @@
+"""Offline semantic matching of medical needs against Services text.
+
+Every distinct service phrase in the dataset (the comma-separated parts of
+Services) becomes an L2-normalized TF-IDF vector of its words and their
+character n-grams, taken within word boundaries, so related word forms
+("pediatric" and "pediatrics", "dentist" and "dental care") score as
+similar without an exact token match. Patient phrasings that share no
+spelling with a service ("anxiety", "teeth cleaning") are first expanded
+through the service synonym table, and every variant is scored.
+
+The vectors are stored both by phrase and as per-n-gram posting lists (the
+transposed sparse matrix), so a query's cosine similarity with every phrase
+is one vectorized scatter-add over the postings of its n-grams. Approximate
+scoring, the default for very large phrase vocabularies, skips the postings
+of the query's most common n-grams and re-scores the phrases found through
+the rest exactly. Since vectors have unit length, a phrase sharing only the
+skipped n-grams scores at most their combined query weight, so n-grams are
+skipped only while that stays below min_score: similarities of at least
+min_score are exact, lower ones may be reported as 0.
+"""
+from collections import Counter
+
+import numpy as np
+
+from service_index import normalize_text
+
+MIN_NGRAM = 3
+MAX_NGRAM = 5
+# Phrase count above which scoring is approximate unless asked otherwise
+APPROXIMATE_MIN_PHRASES = 50000
+
+ARRAYS = ('idf', 'feature_offsets', 'feature_phrases', 'feature_weights', 'phrase_offsets', 'phrase_features',
+          'phrase_weights', 'text_offsets', 'text_phrases', 'phrase_text_offsets', 'phrase_texts')
+
+
+def _phrases(text):
+    return [' '.join(phrase.split()) for phrase in normalize_text(text).split(',') if phrase.strip()]
+
+
+def _ngrams(text):
+    """Character n-grams of each word, padded with spaces to mark word boundaries.
+
+    Words longer than the n-grams are also a feature of their own, so
+    different words with a long shared suffix ("mental", "dental") stay apart.
+    """
+    for word in normalize_text(text).replace(',', ' ').split():
+        padded = f' {word} '
+        if len(padded) > MAX_NGRAM:
+            yield padded
+        for size in range(MIN_NGRAM, MAX_NGRAM + 1):
+            for start in range(len(padded) - size + 1):
+                yield padded[start:start + size]
+
+
+def _ranges(starts, lengths):
+    """Concatenated positions start..start+length for each pair."""
+    total = int(lengths.sum())
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(total)
+
+
+def _transpose(offsets, targets, count):
+    """Invert a CSR mapping (offsets, targets) of len(offsets) - 1 sources into one of count targets."""
+    sources = np.repeat(np.arange(len(offsets) - 1, dtype=np.int32), np.diff(offsets))
+    order = np.argsort(targets, kind='stable')
+    return np.concatenate([[0], np.cumsum(np.bincount(targets, minlength=count))]).astype(np.int64), sources[order]
+
+
+def _weights(counts, idf):
+    # Sublinear term frequency keeps repeated n-grams from dominating short phrases
+    return (1.0 + np.log(counts)) * idf
+
+
+class SemanticIndex:
+    """Character n-gram TF-IDF vectors of the service phrases in a Services column.
+
+    Built from the column's distinct texts; scores() returns one similarity
+    per distinct text, the best cosine of any of its phrases with any query.
+    """
+
+    def __init__(self, vocabulary, idf, feature_offsets, feature_phrases, feature_weights, phrase_offsets,
+                 phrase_features, phrase_weights, text_offsets, text_phrases, phrase_text_offsets, phrase_texts):
+        self.vocabulary = list(vocabulary)
+        self.features = {ngram: index for index, ngram in enumerate(self.vocabulary)}
+        self.idf = idf
+        self.feature_offsets = feature_offsets
+        self.feature_phrases = feature_phrases
+        self.feature_weights = feature_weights
+        self.phrase_offsets = phrase_offsets
+        self.phrase_features = phrase_features
+        self.phrase_weights = phrase_weights
+        self.text_offsets = text_offsets
+        self.text_phrases = text_phrases
+        self.phrase_text_offsets = phrase_text_offsets
+        self.phrase_texts = phrase_texts
+        # Weight of an n-gram no phrase contains, as if its document frequency were zero
+        self.unseen_idf = float(np.log(1 + self.phrase_count) + 1)
+
+    @classmethod
+    def build(cls, texts):
+        """Index the distinct texts of a Services column, in code order."""
+        phrase_ids, text_phrases, text_offsets = {}, [], [0]
+        for text in texts:
+            ids = dict.fromkeys(phrase_ids.setdefault(phrase, len(phrase_ids)) for phrase in _phrases(text))
+            text_phrases.extend(ids)
+            text_offsets.append(len(text_phrases))
+
+        counts = [Counter(_ngrams(phrase)) for phrase in phrase_ids]
+        vocabulary = sorted(set().union(*counts))
+        features = {ngram: index for index, ngram in enumerate(vocabulary)}
+        phrase_features = np.array([features[ngram] for count in counts for ngram in count], dtype=np.int32)
+        frequencies = np.array([n for count in counts for n in count.values()], dtype=np.float64)
+        lengths = np.array([len(count) for count in counts], dtype=np.int64)
+        phrase_offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        phrase_of_entry = np.repeat(np.arange(len(counts), dtype=np.int32), lengths)
+
+        document_frequency = np.bincount(phrase_features, minlength=len(vocabulary))
+        idf = np.log((1 + len(counts)) / (1 + document_frequency)) + 1
+        weights = _weights(frequencies, idf[phrase_features]) if len(phrase_features) else np.empty(0)
+        norms = np.sqrt(np.bincount(phrase_of_entry, weights=weights ** 2, minlength=len(counts)))
+        phrase_weights = (weights / norms[phrase_of_entry]) if len(weights) else weights
+
+        order = np.argsort(phrase_features, kind='stable')
+        text_offsets = np.array(text_offsets, dtype=np.int64)
+        text_phrases = np.array(text_phrases, dtype=np.int32)
+        return cls(
+            vocabulary, idf.astype(np.float32),
+            np.concatenate([[0], np.cumsum(document_frequency)]).astype(np.int64),
+            phrase_of_entry[order], phrase_weights[order].astype(np.float32),
+            phrase_offsets, phrase_features, phrase_weights.astype(np.float32),
+            text_offsets, text_phrases, *_transpose(text_offsets, text_phrases, len(counts)),
+        )
+
+    def arrays(self):
+        """The index's arrays by name (see ARRAYS), for storing in a snapshot."""
+        return {name: getattr(self, name) for name in ARRAYS}
+
+    @property
+    def phrase_count(self):
+        return len(self.phrase_offsets) - 1
+
+    def _vector(self, text):
+        """Sorted feature ids and normalized weights of a query, or None if it shares no n-gram."""
+        counts = Counter(_ngrams(text))
+        known = sorted((self.features[ngram], n) for ngram, n in counts.items() if ngram in self.features)
+        if not known:
+            return None
+        ids = np.array([feature for feature, _ in known], dtype=np.int64)
+        weights = _weights(np.array([n for _, n in known], dtype=np.float64), self.idf[ids])
+        # Unknown n-grams still count towards the query's length, so partial overlaps score lower
+        unseen = np.array([n for ngram, n in counts.items() if ngram not in self.features], dtype=np.float64)
+        norm = np.sqrt((weights ** 2).sum() + (_weights(unseen, self.unseen_idf) ** 2).sum())
+        return ids, weights / norm
+
+    def _scatter(self, starts, lengths, weights, floor):
+        """Phrases scoring above floor on the given n-gram postings alone, and those scores."""
+        entries = _ranges(starts, lengths)
+        scores = np.bincount(self.feature_phrases[entries], weights=self.feature_weights[entries] * np.repeat(weights, lengths),
+                             minlength=self.phrase_count)
+        phrases = np.flatnonzero(scores > floor)
+        return phrases, scores[phrases]
+
+    def _phrase_scores(self, ids, weights, min_score):
+        """Phrases with a positive cosine similarity to a query vector, and the similarities."""
+        starts, lengths = self.feature_offsets[ids], self.feature_offsets[ids + 1] - self.feature_offsets[ids]
+        if not min_score:
+            return self._scatter(starts, lengths, weights, 0.0)
+
+        # Skip the most common n-grams while a phrase sharing only those could not reach min_score
+        common = np.argsort(-lengths, kind='stable')
+        skipped = np.searchsorted(np.sqrt(np.cumsum(weights[common] ** 2)), min_score)
+        bound = np.sqrt((weights[common[:skipped]] ** 2).sum())
+        kept = common[skipped:]
+        # The skipped n-grams add at most bound, so only phrases this close to min_score are re-scored
+        phrases, _ = self._scatter(starts[kept], lengths[kept], weights[kept], min_score - bound)
+        if len(phrases) == 0:
+            return phrases, np.empty(0)
+        phrase_starts = self.phrase_offsets[phrases]
+        phrase_lengths = self.phrase_offsets[phrases + 1] - phrase_starts
+        entries = _ranges(phrase_starts, phrase_lengths)
+        query = np.zeros(len(self.vocabulary))
+        query[ids] = weights
+        products = query[self.phrase_features[entries]] * self.phrase_weights[entries]
+        return phrases, np.add.reduceat(products, np.cumsum(phrase_lengths) - phrase_lengths)
+
+    def scores(self, queries, min_score=0.0, approximate=None):
+        """Best cosine similarity, per distinct text, of any of its phrases with any query.
+
+        With approximate (by default when there are more than
+        APPROXIMATE_MIN_PHRASES phrases), similarities below min_score may be
+        reported as 0.
+        """
+        if approximate is None:
+            approximate = self.phrase_count > APPROXIMATE_MIN_PHRASES
+        result = np.zeros(len(self.text_offsets) - 1)
+        for query in queries:
+            vector = self._vector(query)
+            if vector is None:
+                continue
+            phrases, scores = self._phrase_scores(*vector, min_score if approximate else 0.0)
+            starts = self.phrase_text_offsets[phrases]
+            lengths = self.phrase_text_offsets[phrases + 1] - starts
+            np.maximum.at(result, self.phrase_texts[_ranges(starts, lengths)], np.repeat(scores, lengths))
+        return result
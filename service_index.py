@@ -0,0 +1,130 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+from fuzzywuzzy import fuzz
+
+MAX_NGRAM = 3
+TYPO_THRESHOLD = 80
+
+# Patient phrasing -> service phrases used in the dataset
+SYNONYMS = {
+    'counseling': ['mental health', 'behavioral health'],
+    'counselling': ['mental health', 'behavioral health'],
+    'therapy': ['mental health', 'counseling'],
+    'therapist': ['mental health', 'counseling'],
+    'psychiatrist': ['mental health', 'behavioral health'],
+    'depression': ['mental health', 'behavioral health'],
+    'anxiety': ['mental health', 'behavioral health'],
+    'teeth': ['dental'],
+    'tooth': ['dental'],
+    'dentist': ['dental'],
+    'doctor': ['primary care'],
+    'checkup': ['primary care', 'health screenings'],
+    'physical': ['primary care', 'health screenings'],
+    'screening': ['health screenings'],
+    'kids': ['pediatrics'],
+    'children': ['pediatrics'],
+    'child': ['pediatrics'],
+    'pediatrician': ['pediatrics'],
+    'obgyn': ['womens health'],
+    'gynecologist': ['womens health'],
+    'pregnancy': ['womens health', 'family planning'],
+    'prenatal': ['womens health'],
+    'birth control': ['family planning'],
+    'contraception': ['family planning'],
+    'shots': ['immunizations'],
+    'vaccine': ['immunizations'],
+    'vaccines': ['immunizations'],
+    'vaccination': ['immunizations'],
+    'addiction': ['substance abuse treatment'],
+    'rehab': ['substance abuse treatment'],
+    'detox': ['substance abuse treatment'],
+    'diabetes': ['chronic disease management'],
+    'blood pressure': ['chronic disease management'],
+    'hypertension': ['chronic disease management'],
+    'specialist': ['specialty care'],
+}
+
+
+def normalize_text(text):
+    """Lowercase text, drop accents and apostrophes and collapse punctuation to spaces."""
+    # Decompose accented letters and drop only the combining marks, so "niños" reads as "ninos"
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char)).replace('’', '').replace("'", '')
+    return re.sub(r'(?:[^\w,]|_)+', ' ', text).strip()
+
+
+def _terms(text):
+    """Token n-grams of each comma-separated phrase in the text."""
+    terms = set()
+    for phrase in normalize_text(text).split(','):
+        tokens = phrase.split()
+        for size in range(1, MAX_NGRAM + 1):
+            for start in range(len(tokens) - size + 1):
+                terms.add(' '.join(tokens[start:start + size]))
+    return terms
+
+
+class ServiceIndex:
+    """Inverted index from normalized Services tokens and n-grams to row ids."""
+
+    def __init__(self, postings):
+        self.postings = postings
+        self.vocabulary = [term for term in postings if ' ' not in term]
+
+    @classmethod
+    def build(cls, codes, uniques):
+        """Index a dictionary-encoded Services column."""
+        # Postings are built per distinct Services text, then expanded to rows
+        rows_by_code = pd.Series(codes).groupby(codes).indices
+
+        postings = {}
+        for code, text in enumerate(uniques):
+            for term in _terms(text):
+                postings.setdefault(term, []).append(rows_by_code[code])
+        return cls({term: np.unique(np.concatenate(rows)) for term, rows in postings.items()})
+
+    def __len__(self):
+        return len(self.postings)
+
+    def expand(self, needs):
+        """Return the query's index terms and the phrases to fuzzy-score with.
+
+        The phrases are the needs, the synonyms of their terms and, for
+        misspelled words, the close words from the vocabulary.
+        """
+        terms = _terms(needs)
+        variants = [needs.lower()]
+        for term in list(terms):
+            for synonym in SYNONYMS.get(term, []):
+                terms |= _terms(synonym)
+                variants.append(synonym)
+
+        # Misspelled tokens fall back to close words from the vocabulary
+        for term in [t for t in terms if ' ' not in t and t not in self.postings]:
+            corrections = [word for word in self.vocabulary if fuzz.ratio(term, word) >= TYPO_THRESHOLD]
+            terms.update(corrections)
+            variants.extend(corrections)
+        return terms, variants
+
+    def lookup(self, terms, rows=None):
+        """Rows listed under any of the terms, as sorted row ids.
+
+        When rows is given, only those (sorted) rows are probed against the
+        posting lists, so the cost follows the candidate count rather than the
+        posting list sizes.
+        """
+        if rows is None:
+            lists = [self.postings[term] for term in terms if term in self.postings]
+            return np.unique(np.concatenate(lists)) if lists else np.empty(0, dtype=np.intp)
+        return rows[self.contains(terms, rows)]
+
+    def contains(self, terms, rows):
+        """Boolean mask of the rows listed under any of the terms."""
+        found = np.zeros(len(rows), dtype=bool)
+        for posting in (self.postings[term] for term in terms if term in self.postings):
+            positions = np.minimum(np.searchsorted(posting, rows), len(posting) - 1)
+            found |= posting[positions] == rows
+        return found
@@ -0,0 +1,186 @@
+"""Versioned, memory-mapped binary snapshot of the resources dataset.
+
+A snapshot is a directory of .npy arrays plus a manifest. Text columns are
+dictionary-encoded (integer codes plus their distinct values), and the
+matcher's lowercase encodings, ZIP groups, Services posting lists and
+Services semantic vectors are stored alongside, so loading skips CSV
+parsing and index building. Arrays
+are opened with mmap so several server processes share the same pages.
+
+    python snapshot.py [resources.csv]   # rebuild the snapshot from a CSV
+"""
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from matcher import ResourceMatcher
+from refresh import dataset_revision
+from semantic import ARRAYS as SEMANTIC_ARRAYS, SemanticIndex
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 5
+SEPARATOR = '\x00'
+
+
+def snapshot_path_for(csv_path):
+    """Snapshot directory that accompanies a resources CSV."""
+    return os.path.splitext(csv_path)[0] + '.snapshot'
+
+
+def _codes_dtype(count):
+    # Same width pandas uses for categorical codes, so loading does not copy them
+    for dtype in (np.int8, np.int16, np.int32):
+        if count < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _write_values(path, values):
+    with open(path, 'wb') as f:
+        f.write(SEPARATOR.join(str(v).replace(SEPARATOR, '') for v in values).encode('utf-8'))
+
+
+def _read_values(path):
+    with open(path, 'rb') as f:
+        text = f.read().decode('utf-8')
+    return text.split(SEPARATOR) if text else []
+
+
+def _write_encoded(directory, name, codes, values):
+    np.save(os.path.join(directory, f'{name}.codes.npy'), np.asarray(codes).astype(_codes_dtype(len(values))))
+    _write_values(os.path.join(directory, f'{name}.values'), values)
+
+
+def _read_encoded(directory, name):
+    codes = np.load(os.path.join(directory, f'{name}.codes.npy'), mmap_mode='r')
+    return codes, _read_values(os.path.join(directory, f'{name}.values'))
+
+
+def _write_groups(directory, name, groups):
+    keys = list(groups)
+    lengths = [len(groups[key]) for key in keys]
+    np.save(os.path.join(directory, f'{name}.offsets.npy'), np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64))
+    rows = np.concatenate([groups[key] for key in keys]) if keys else np.empty(0)
+    np.save(os.path.join(directory, f'{name}.rows.npy'), rows.astype(np.int64))
+    _write_values(os.path.join(directory, f'{name}.keys'), keys)
+
+
+def _read_groups(directory, name):
+    offsets = np.load(os.path.join(directory, f'{name}.offsets.npy'))
+    rows = np.load(os.path.join(directory, f'{name}.rows.npy'), mmap_mode='r')
+    keys = _read_values(os.path.join(directory, f'{name}.keys'))
+    return {key: rows[offsets[i]:offsets[i + 1]] for i, key in enumerate(keys)}
+
+
+def write_snapshot(matcher, path, revision=None):
+    """Write the matcher's dataset and indexes as a snapshot directory.
+
+    revision is the dataset revision number from the refresh state, if any
+    (by default the matcher's).
+    The snapshot is written next to the target and swapped in with a rename,
+    so readers never see a partial snapshot.
+    """
+    df = matcher.df
+    staging = path + '.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    columns = []
+    for name in df.columns:
+        if pd.api.types.is_float_dtype(df[name]):
+            np.save(os.path.join(staging, f'col.{name}.npy'), df[name].to_numpy(dtype=np.float64))
+            columns.append({'name': name, 'kind': 'float'})
+        else:
+            codes, uniques = pd.factorize(df[name].astype(object).map(lambda v: v if pd.isna(v) else str(v)))
+            _write_encoded(staging, f'col.{name}', codes, uniques)
+            columns.append({'name': name, 'kind': 'dictionary'})
+
+    for name, (codes, uniques) in matcher.encoded.items():
+        _write_encoded(staging, f'lower.{name}', codes, uniques)
+    _write_groups(staging, 'zip', matcher.zip_groups)
+    _write_groups(staging, 'services', matcher.service_index.postings)
+    for name, array in matcher.semantic_index.arrays().items():
+        np.save(os.path.join(staging, f'semantic.{name}.npy'), array)
+    _write_values(os.path.join(staging, 'semantic.vocabulary'), matcher.semantic_index.vocabulary)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'fingerprint': matcher.fingerprint,
+        'revision': revision if revision is not None else matcher.revision,
+        'rows': len(df),
+        'columns': columns,
+        'encoded': list(matcher.encoded),
+        'created': time.time(),
+    }
+    with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=4)
+
+    previous = path + '.old'
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, previous)
+    os.rename(staging, path)
+    shutil.rmtree(previous, ignore_errors=True)
+    logger.info(f"Saved snapshot of {len(df)} resources to {path}")
+
+
+def read_snapshot(path):
+    """Open a snapshot as a ResourceMatcher backed by memory-mapped arrays."""
+    with open(os.path.join(path, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format_version')} in {path}")
+
+    data = {}
+    for column in manifest['columns']:
+        name = column['name']
+        if column['kind'] == 'float':
+            data[name] = np.load(os.path.join(path, f'col.{name}.npy'), mmap_mode='r')
+        else:
+            codes, values = _read_encoded(path, f'col.{name}')
+            # Object categories reference the decoded strings directly instead of converting them
+            data[name] = pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(pd.Index(values, dtype=object)))
+    df = pd.DataFrame(data, columns=[column['name'] for column in manifest['columns']], copy=False)
+
+    encoded = {}
+    for name in manifest['encoded']:
+        codes, values = _read_encoded(path, f'lower.{name}')
+        encoded[name] = (codes, np.asarray(values, dtype=object))
+    indexes = {
+        'fingerprint': manifest['fingerprint'],
+        'zip_groups': _read_groups(path, 'zip'),
+        'encoded': encoded,
+        'service_postings': _read_groups(path, 'services'),
+        'semantic': SemanticIndex(_read_values(os.path.join(path, 'semantic.vocabulary')),
+                                  **{name: np.load(os.path.join(path, f'semantic.{name}.npy'), mmap_mode='r')
+                                     for name in SEMANTIC_ARRAYS}),
+    }
+    return ResourceMatcher(df, indexes=indexes, revision=manifest['revision'])
+
+
+def open_matcher(csv_path="resources.csv"):
+    """Load the dataset, preferring a snapshot that is at least as new as the CSV.
+
+    Raises FileNotFoundError when neither exists.
+    """
+    path = snapshot_path_for(csv_path)
+    manifest = os.path.join(path, 'manifest.json')
+    if os.path.exists(manifest) and (not os.path.exists(csv_path) or os.path.getmtime(manifest) >= os.path.getmtime(csv_path)):
+        try:
+            return read_snapshot(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not read snapshot {path}: {e}. Falling back to {csv_path}.")
+    return ResourceMatcher(pd.read_csv(csv_path), revision=dataset_revision(csv_path))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    source = sys.argv[1] if len(sys.argv) > 1 else "resources.csv"
+    write_snapshot(ResourceMatcher(pd.read_csv(source), revision=dataset_revision(source)), snapshot_path_for(source))
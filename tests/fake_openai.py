@@ -0,0 +1,90 @@
+"""Local stand-in for the OpenAI chat completions API, for testing the AI search offline.
+
+Answers every POST /v1/chat/completions with a fixed reply streamed as
+server-sent events, a few characters per chunk, and counts the requests.
+Point the app at it with OPENAI_BASE_URL:
+
+    python tests/fake_openai.py --port 8799 --delay 0.05
+    OPENAI_API_KEY=sk-test OPENAI_BASE_URL=http://127.0.0.1:8799/v1 python search_service.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = {
+    "resources": [
+        {"Resource_Name": "Fake Dental Clinic", "Address": "1 Main St, Austin, TX 78701", "Services": "Dental care",
+         "Eligibility": "Uninsured", "Hours": "M-F 8AM-5PM", "Contact": "512-000-0000", "ZIP_Code": "78701",
+         "Languages": "English", "Gender": "All"},
+        {"Resource_Name": "Fake Family Clinic", "Address": "2 Main St, Austin, TX 78701", "Services": "Primary care",
+         "Eligibility": "Uninsured", "Hours": "M-F 8AM-5PM", "Contact": "512-000-0001", "ZIP_Code": "78701",
+         "Languages": "English, Spanish", "Gender": "All"},
+    ],
+    "recommendation": "Call ahead to confirm hours.",
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        fake = self.server.fake
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b'{}')
+        with fake.lock:
+            fake.requests.append(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        text = json.dumps(fake.reply, indent=2)
+        for start in range(0, len(text), fake.chunk_size):
+            chunk = {"id": "fake", "object": "chat.completion.chunk", "created": 0, "model": body.get("model", ""),
+                     "choices": [{"index": 0, "delta": {"content": text[start:start + fake.chunk_size]},
+                                  "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            with fake.lock:
+                fake.chunks_sent += 1
+            time.sleep(fake.delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class FakeOpenAI:
+    """Fake server on a background thread; use as a context manager.
+
+    requests holds the JSON body of every request, chunks_sent the number of
+    streamed chunks so far; delay is the pause after each chunk.
+    """
+
+    def __init__(self, reply=REPLY, chunk_size=40, delay=0.0, port=0):
+        self.reply = reply
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.requests = []
+        self.chunks_sent = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake streaming OpenAI chat completions API.")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds between streamed chunks")
+    args = parser.parse_args()
+    with FakeOpenAI(delay=args.delay, port=args.port) as fake:
+        print(f"Fake OpenAI API at {fake.url}")
+        threading.Event().wait()
@@ -0,0 +1,36 @@
+import json
+import os
+
+import pytest
+
+from batch import main, triage
+from conftest import ROOT
+
+CSV_PATH = os.path.join(ROOT, "resources.csv")
+GOOD = {'id': 'a', 'zip_code': '78702', 'needs': 'primary care', 'insurance': 'Uninsured'}
+BAD = [
+    {'id': 'b', 'zip_code': '78702', 'needs': 'dental', 'open_day': 'funday'},
+    {'id': 'c', 'zip_code': '78702', 'needs': 'dental', 'radius_miles': 'far'},
+    {'id': 'd', 'zip_code': '78702', 'needs': 'dental', 'k': 0},
+]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_malformed_queries_do_not_stop_the_batch(workers):
+    queries = [GOOD, *BAD, {**GOOD, 'id': 'e'}]
+    results = list(triage(queries, CSV_PATH, workers=workers, batch_size=2))
+    assert [result.get('id', result.get('query', {}).get('id')) for result in results] == ['a', 'b', 'c', 'd', 'e']
+    assert results[0]['total'] > 0 and results[4]['total'] == results[0]['total']
+    assert all(set(result) == {'id', 'error'} for result in results[1:4])
+    assert 'funday' in results[1]['error']
+
+
+def test_cli_reports_bad_lines_and_keeps_going(tmp_path):
+    queries = tmp_path / "queries.jsonl"
+    queries.write_text('\n'.join([json.dumps(GOOD), '{not json', json.dumps(BAD[0]), json.dumps(GOOD)]) + '\n')
+    output = tmp_path / "results.jsonl"
+    main([str(queries), '-o', str(output), '--dataset', CSV_PATH, '--workers', '1'])
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(results) == 4
+    assert 'error' in results[1] and 'error' in results[2]
+    assert results[0]['results'] == results[3]['results']
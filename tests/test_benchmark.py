@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+from benchmark import best_results, compare_to_baseline
+from conftest import ROOT
+
+BASELINE = {'rows_1000.search_p95_ms': 10.0, 'rows_1000.load_csv_s': 1.0, 'scrapers.a.pages_per_s': 40.0,
+            'rows_1000.search_mean_results': 5.0}
+
+
+def _regressed(results):
+    return [regression['metric'] for regression in compare_to_baseline(results, BASELINE)]
+
+
+def test_times_regress_beyond_the_threshold_and_noise_floor():
+    assert _regressed({'rows_1000.search_p95_ms': 12.9, 'rows_1000.load_csv_s': 1.2}) == []
+    # 50% slower but within the noise floor
+    assert _regressed({'rows_1000.search_p95_ms': 14.9}) == []
+    assert _regressed({'rows_1000.search_p95_ms': 20.0, 'rows_1000.load_csv_s': 2.0}) == \
+        ['rows_1000.search_p95_ms', 'rows_1000.load_csv_s']
+
+
+def test_rates_have_their_own_threshold_and_counts_are_skipped():
+    assert _regressed({'scrapers.a.pages_per_s': 24.0, 'rows_1000.search_mean_results': 50.0}) == []
+    assert _regressed({'scrapers.a.pages_per_s': 19.0}) == ['scrapers.a.pages_per_s']
+
+
+def test_best_results_keeps_the_better_value_of_two_runs():
+    first = {'rows_1000.search_p95_ms': 20.0, 'scrapers.a.pages_per_s': 30.0, 'rows_1000.search_mean_results': 5.0}
+    second = {'rows_1000.search_p95_ms': 11.0, 'scrapers.a.pages_per_s': 25.0, 'rows_1000.search_mean_results': 6.0}
+    assert best_results(first, second) == {'rows_1000.search_p95_ms': 11.0, 'scrapers.a.pages_per_s': 30.0,
+                                           'rows_1000.search_mean_results': 5.0}
+
+
+def test_importing_the_sources_writes_no_log_file(tmp_path):
+    env = {**os.environ, 'PYTHONPATH': ROOT}
+    subprocess.run([sys.executable, '-c', 'import generate_data'], cwd=tmp_path, env=env, check=True)
+    assert not os.path.exists(tmp_path / "scraper.log")
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bitsets import AttributeBitmaps, pack_rows, rows_in, set_rows
+
+VALUES = ['uninsured', 'medicaid', 'uninsured, medicaid', 'low-income, uninsured', 'all patients', 'medicare, chip',
+          'uninsured, sliding fee scale', 'veterans', '']
+QUERIES = ['uninsured', 'Medicaid', 'caid', 'sliding fee', 'low', 'all', 'chip', 'unknown', '', 'uninsured, medicaid',
+           'd, m', ' medicaid', 'medicaid ', ' ']
+
+
+def _column(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.Series(np.array(VALUES, dtype=object)[rng.integers(0, len(VALUES), count)])
+
+
+def _substring_rows(column, value):
+    """The original filter: the value is a substring of the row's text, or the text contains the wildcard."""
+    return np.flatnonzero([value.lower() in text or 'all' in text for text in column])
+
+
+@pytest.mark.parametrize('count', [0, 1, 63, 64, 65, 127, 128, 1000])
+def test_pack_rows_round_trips(count):
+    mask = np.random.default_rng(count).random(count) < 0.3
+    words = pack_rows(mask)
+    assert len(words) == -(-count // 64)
+    assert list(set_rows(words, count)) == list(np.flatnonzero(mask))
+    rows = np.arange(count)
+    assert list(rows_in(words, rows)) == list(mask)
+
+
+@pytest.mark.parametrize('count', [1, 63, 64, 65, 200, 1000])
+def test_filters_match_the_substring_filter(count):
+    column = _column(count, seed=count)
+    bitmaps = AttributeBitmaps(*pd.factorize(column, sort=False))
+    for value in QUERIES:
+        # Twice, the second time from the cache
+        for _ in range(2):
+            assert list(set_rows(bitmaps.matching(value), count)) == list(_substring_rows(column, value)), value
+
+
+def test_anded_filters_match_the_combined_mask():
+    count = 777
+    columns = [_column(count, seed) for seed in (1, 2)]
+    first, second = (AttributeBitmaps(*pd.factorize(column, sort=False)) for column in columns)
+    words = first.matching('uninsured') & second.matching('medicaid')
+    expected = np.intersect1d(_substring_rows(columns[0], 'uninsured'), _substring_rows(columns[1], 'medicaid'))
+    assert list(set_rows(words, count)) == list(expected)
+    rows = np.array([0, 5, 63, 64, 700, 776])
+    assert list(rows_in(words, rows)) == [row in set(expected) for row in rows]
+
+
+def test_empty_filters():
+    bitmaps = AttributeBitmaps(np.empty(0, dtype=np.intp), [])
+    assert len(bitmaps.matching('uninsured')) == 0
+    assert list(set_rows(bitmaps.matching(''), 0)) == []
+
+    # No row matches and none has the wildcard
+    column = pd.Series(['medicaid'] * 70)
+    bitmaps = AttributeBitmaps(*pd.factorize(column, sort=False))
+    assert list(set_rows(bitmaps.matching('uninsured'), 70)) == []
+    assert list(rows_in(bitmaps.matching('uninsured'), np.empty(0, dtype=np.intp))) == []
@@ -0,0 +1,130 @@
+import pytest
+
+import dedup
+from dedup import (DisjointSet, deduplicate, is_duplicate, merge_cluster, normalize_name, normalize_phone,
+                   normalize_street, resource_zip)
+
+
+def _record(name, address, phone, **fields):
+    return {'Resource_Name': name, 'Address': address, 'Contact': phone, **fields}
+
+
+def _key(name, address, phone):
+    return normalize_name(name), normalize_street(address), normalize_phone(phone)
+
+
+def test_normalize_name():
+    assert normalize_name("People’s Community Clinic") == "people community clinic"
+    assert normalize_name("Dental & Vision, Inc.") == "dental and vision inc"
+    assert normalize_name(None) == ""
+
+
+def test_normalize_street():
+    assert normalize_street("1015 Norwood Park Boulevard, Austin, TX 78753") == "1015 norwood park blvd"
+    assert normalize_street("2301 S. Interstate Highway 35 Suite 200") == "2301 s i hwy 35 ste 200"
+    assert normalize_street(None) == ""
+
+
+@pytest.mark.parametrize('phone, expected', [
+    ("(512) 978-9015", "5129789015"),
+    ("+1 512.978.9015", "5129789015"),
+    ("512-555-0123", ""),
+    ("978-9015", ""),
+    (None, ""),
+])
+def test_normalize_phone(phone, expected):
+    assert normalize_phone(phone) == expected
+
+
+def test_resource_zip_prefers_the_address():
+    assert resource_zip({'Address': "1 Main St, Austin, TX 78701", 'ZIP_Code': "78702"}) == "78701"
+    assert resource_zip({'Address': "1 Main St", 'ZIP_Code': " 78702 "}) == "78702"
+
+
+@pytest.mark.parametrize('a, b', [
+    # Same phone and street, names differing in wording
+    (("Austin Free Clinic", "1 Main St", "512-978-9015"), ("The Austin Free Clinic", "1 Main Street", "5129789015")),
+    (("CommUnityCare Rundberg", "801 W Rundberg Ln", "512-978-9015"),
+     ("CommUnityCare Health Centers - Rundberg", "801 West Rundberg Lane", "512-978-9015")),
+    (("Volunteer Healthcare Clinic", "4215 Medical Pkwy", "512-978-9015"),
+     ("Volunteer Health Care Clinic", "4215 Medical Parkway", "512-978-9015")),
+    # Near-identical names sharing only one of phone or street
+    (("Hope Family Clinic", "1 Main St", "512-978-9015"), ("Hope Family Clinic", "9 Oak Ave", "512-978-9015")),
+    (("El Buen Samaritano", "7000 Woodhue Dr", "512-439-0700"), ("El Buen Samaritano.", "7000 Woodhue Drive", "")),
+])
+def test_true_duplicates(a, b):
+    assert is_duplicate(_key(*a), _key(*b))
+
+
+@pytest.mark.parametrize('a, b', [
+    # Different clinics behind one front desk at a multi-tenant address
+    (("Eastside Dental Clinic", "1 Main St Ste 100", "512-978-9015"),
+     ("Eastside Pediatric Clinic", "1 Main St Ste 100", "512-978-9015")),
+    (("Integral Care", "1 Main St", "512-978-9015"), ("Vida Clinic", "1 Main St", "512-978-9015")),
+    (("Community Health Center Dental", "1 Main St", "512-978-9015"),
+     ("Community Health Center Pediatrics", "1 Main St", "512-978-9015")),
+    # Same name and street name but different house numbers
+    (("Hope Family Clinic", "1 Main St", ""), ("Hope Family Clinic", "10 Main St", "")),
+    # Same name, nothing else shared
+    (("Hope Family Clinic", "1 Main St", "512-978-9015"), ("Hope Family Clinic", "9 Oak Ave", "512-444-0000")),
+    # Fictional 555 numbers are not a shared phone
+    (("Hope Family Clinic", "1 Main St", "512-555-0100"), ("Hope Family Clinic", "9 Oak Ave", "512-555-0100")),
+])
+def test_near_misses(a, b):
+    assert not is_duplicate(_key(*a), _key(*b))
+
+
+def test_disjoint_set_joins_clusters():
+    clusters = DisjointSet(5)
+    assert clusters.union(0, 1) and clusters.union(3, 4) and clusters.union(1, 4)
+    assert not clusters.union(0, 3)
+    assert len({clusters.find(i) for i in range(5)}) == 2
+    assert clusters.find(2) == 2
+
+
+def test_merge_cluster_picks_fields_in_source_priority_order():
+    merged = merge_cluster([
+        _record("Austin Free Clinic", "1 Main St", "512-555-0100", Hours="Contact for hours", Services="Dental, primary care",
+                Languages="English", Gender="All", Eligibility=""),
+        _record("The Austin Free Clinic", "1 Main Street, Austin, TX 78701", "512-978-9015", Hours="M-F 8AM-5PM",
+                Services="Primary Care, vision", Languages="Spanish", Gender="Female-only", Eligibility="Uninsured",
+                ZIP_Code="78702"),
+    ])
+    assert merged['Resource_Name'] == "Austin Free Clinic"
+    assert merged['Gender'] == "All"
+    assert (merged['Address'], merged['ZIP_Code']) == ("1 Main Street, Austin, TX 78701", "78701")
+    assert merged['Contact'] == "512-978-9015"
+    assert merged['Hours'] == "M-F 8AM-5PM"
+    assert merged['Services'] == "Dental, primary care, vision"
+    assert merged['Languages'] == "English, Spanish"
+    assert merged['Eligibility'] == "Uninsured"
+
+
+def test_deduplicate_merges_clusters_in_place():
+    resources = [
+        _record("Austin Free Clinic", "1 Main St, Austin, TX 78701", "512-978-9015"),
+        _record("Eastside Dental Clinic", "5 Oak Ave Ste 100, Austin, TX 78702", "512-444-0000"),
+        _record("Eastside Pediatric Clinic", "5 Oak Ave Ste 100, Austin, TX 78702", "512-444-0000"),
+        _record("The Austin Free Clinic", "1 Main Street, Austin, TX 78701", "(512) 978-9015"),
+        # Joined to the first record through the third, by name and phone
+        _record("Austin Free Clinic Inc", "200 Elm St, Austin, TX 78703", "512-978-9015"),
+    ]
+    deduplicated, metrics = deduplicate(resources)
+    assert [r['Resource_Name'] for r in deduplicated] == [
+        "Austin Free Clinic", "Eastside Dental Clinic", "Eastside Pediatric Clinic"]
+    assert metrics['clusters_merged'] == 1 and metrics['records_removed'] == 2
+
+
+def test_large_blocks_compare_only_name_neighbours(monkeypatch):
+    monkeypatch.setattr(dedup, 'MAX_BLOCK_PAIRWISE', 4)
+    monkeypatch.setattr(dedup, 'WINDOW', 1)
+    # One ZIP block of six records; only the Hope pair are name neighbours and duplicates
+    resources = [_record(name, f"{number} Main St, Austin, TX 78701", "") for number, name in enumerate(
+        ["Zeta Clinic", "Hope Clinic", "Alpha Clinic", "Mu Clinic", "Hope Clinic", "Beta Clinic"])]
+    deduplicated, metrics = deduplicate(resources)
+    assert metrics['comparisons'] == 5
+    assert len(deduplicated) == 6
+
+    resources[4]['Address'] = resources[1]['Address']
+    deduplicated, metrics = deduplicate(resources)
+    assert [r['Resource_Name'] for r in deduplicated] == ["Zeta Clinic", "Hope Clinic", "Alpha Clinic", "Mu Clinic", "Beta Clinic"]
@@ -0,0 +1,21 @@
+import numpy as np
+
+from geo import GeoIndex, KDTree
+
+
+def test_kdtree_nearest_matches_brute_force():
+    points = np.random.default_rng(0).uniform(0, 100, size=(500, 2))
+    tree = KDTree(points, leaf_size=8)
+    ids, distances = tree.nearest((40.0, 60.0), 10)
+    expected = np.argsort(np.hypot(*(points - (40.0, 60.0)).T))[:10]
+    assert list(ids) == list(expected)
+    assert np.all(np.diff(distances) >= 0)
+
+
+def test_nearest_with_no_neighbours_requested_is_empty():
+    tree = KDTree(np.random.default_rng(1).uniform(0, 10, size=(50, 2)))
+    for k in (0, -1):
+        ids, distances = tree.nearest((5.0, 5.0), k)
+        assert len(ids) == 0 and len(distances) == 0
+    rows, distances = GeoIndex([30.26, 30.3], [-97.74, -97.7]).nearest(30.27, -97.74, 0)
+    assert len(rows) == 0 and len(distances) == 0
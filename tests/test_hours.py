@@ -0,0 +1,98 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from hours import MINUTES_PER_DAY, HoursIndex, format_intervals, parse_hours, parse_intervals, query_window
+
+
+def _days(days, start, end):
+    """Intervals for the same opening time on each of the given days (0 = Monday)."""
+    return [(day * MINUTES_PER_DAY + start, day * MINUTES_PER_DAY + end) for day in days]
+
+
+WEEKDAYS_8_TO_5 = _days(range(5), 8 * 60, 17 * 60)
+
+# Every distinct Hours value in resources.csv; a new value must be added here
+DATASET_HOURS = {
+    'M-F 8AM-5PM': WEEKDAYS_8_TO_5,
+    'Th 6PM-9PM': _days([3], 18 * 60, 21 * 60),
+    'Contact for hours': None,
+}
+
+COMMON_FORMS = {
+    'M-F: 8AM-5PM': WEEKDAYS_8_TO_5,
+    'M-F 8AM-5PM (walk-ins)': WEEKDAYS_8_TO_5,
+    'Mon-Fri: 8:00 AM - 5:00 PM': WEEKDAYS_8_TO_5,
+    'Monday to Friday 8-5': WEEKDAYS_8_TO_5,
+    '8AM-5PM M-F': WEEKDAYS_8_TO_5,
+    '7AM-7PM daily': _days(range(7), 7 * 60, 19 * 60),
+    'Tu, Th 5PM-8PM': _days([1, 3], 17 * 60, 20 * 60),
+    'M-F 8AM-5PM, Sa 9AM-1PM': WEEKDAYS_8_TO_5 + _days([5], 9 * 60, 13 * 60),
+    'M-F 8AM-12PM, 1PM-5PM': sorted(_days(range(5), 8 * 60, 12 * 60) + _days(range(5), 13 * 60, 17 * 60)),
+    'Sa noon-4PM': _days([5], 12 * 60, 16 * 60),
+    'Fri 10PM-2AM': _days([4], 22 * 60, 26 * 60),
+    'Su 8PM-1AM': [(0, 60), (6 * MINUTES_PER_DAY + 20 * 60, 7 * MINUTES_PER_DAY)],
+    '24/7': [(0, 7 * MINUTES_PER_DAY)],
+}
+
+# Forms left unknown on purpose: reading them would mean guessing
+KNOWN_UNKNOWN = [
+    'By appointment',
+    'Varies',
+    '9AM-5PM',
+    'M-F 8AM-5PM (closed Wed)',
+    'M-F 8AM-5PM except holidays',
+    '8AM-5PM weekdays, closed weekends',
+    'Sa closed',
+    '',
+    None,
+]
+
+
+def test_every_dataset_hours_value_parses_as_expected():
+    values = pd.read_csv(os.path.join(ROOT, "resources.csv"))['Hours'].dropna().unique()
+    assert set(values) == set(DATASET_HOURS)
+    for text in values:
+        assert parse_hours(text) == DATASET_HOURS[text], text
+
+
+@pytest.mark.parametrize('text, expected', COMMON_FORMS.items())
+def test_common_forms(text, expected):
+    assert parse_hours(text) == expected
+
+
+@pytest.mark.parametrize('text', KNOWN_UNKNOWN)
+def test_known_unknown_forms(text):
+    assert parse_hours(text) is None
+
+
+def test_intervals_round_trip_through_the_column_format():
+    for text, expected in {**DATASET_HOURS, **COMMON_FORMS}.items():
+        assert parse_intervals(format_intervals(parse_hours(text))) == (expected and [tuple(pair) for pair in expected])
+
+
+def test_query_windows():
+    thursday_evening = datetime(2026, 10, 15, 19, 30)
+    now_minute = 3 * MINUTES_PER_DAY + 19 * 60 + 30
+    assert query_window(open_now=True, now=thursday_evening) == (now_minute, now_minute + 1)
+    assert query_window(open_day='today', open_after='6pm', now=thursday_evening) == (3 * MINUTES_PER_DAY + 18 * 60, 4 * MINUTES_PER_DAY)
+    assert query_window() is None
+    for bad in [{'open_day': 'funday'}, {'open_day': 'mon', 'open_after': 'late'}, {'open_after': '6pm'}]:
+        with pytest.raises(ValueError):
+            query_window(**bad)
+
+
+def test_index_matches_brute_force():
+    texts = list(DATASET_HOURS) + list(COMMON_FORMS) + KNOWN_UNKNOWN[:3]
+    df = pd.DataFrame({'Hours': texts})
+    index = HoursIndex.from_frame(df)
+    rows = np.arange(len(df))
+    for start in range(0, 7 * MINUTES_PER_DAY, 37):
+        for window in [(start, start + 1), (start, (start // MINUTES_PER_DAY + 1) * MINUTES_PER_DAY)]:
+            expected = [any(open_start < window[1] and open_end > window[0] for open_start, open_end in parse_hours(text) or [])
+                        for text in texts]
+            assert list(index.open_rows(rows, window)) == expected, window
@@ -0,0 +1,88 @@
+"""The streamed AI search against the local fake OpenAI server (tests/fake_openai.py)."""
+import json
+import os
+import time
+
+import pytest
+
+import search
+import search_service
+from conftest import ROOT
+from fake_openai import REPLY, FakeOpenAI
+from llm_cache import LLMCache
+from llm_stream import ResourceStreamParser
+
+QUERY = {'zip_code': '78701', 'needs': 'dental', 'insurance': 'Uninsured', 'language': 'English', 'gender': 'All'}
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    """Yield a function starting a one-process SearchService wired to a FakeOpenAI."""
+    monkeypatch.setattr(search, 'OPENAI_API_KEY', 'sk-test')
+    services = []
+
+    def start(fake):
+        monkeypatch.setenv('OPENAI_BASE_URL', fake.url)
+        started = search_service.SearchService(csv_path=os.path.join(ROOT, "resources.csv"), workers=1)
+        started.cache = LLMCache(str(tmp_path / "cache.sqlite3"))
+        services.append(started)
+        return started
+
+    yield start
+    for started in services:
+        started.close()
+
+
+def test_parser_returns_each_resource_once_complete():
+    text = json.dumps(REPLY, indent=2)
+    parser = ResourceStreamParser()
+    found = []
+    for start in range(0, len(text), 7):
+        found += [(resource['Resource_Name'], start) for resource in parser.feed(text[start:start + 7])]
+    assert [name for name, _ in found] == [resource['Resource_Name'] for resource in REPLY['resources']]
+    # The first resource is complete well before the reply ends
+    assert found[0][1] < text.index('"Fake Family Clinic"')
+    assert parser.finish() == REPLY
+
+
+def test_resources_stream_before_the_reply_ends():
+    with FakeOpenAI(chunk_size=20, delay=0.01) as fake:
+        client = search.openai.OpenAI(api_key='sk-test', base_url=fake.url, timeout=5)
+        seen = []
+        reply = search.ask_llm(client, "prompt", on_resource=lambda resource: seen.append(fake.chunks_sent))
+        assert reply == REPLY
+        assert len(seen) == len(REPLY['resources'])
+        assert seen[0] < fake.chunks_sent
+
+
+def test_second_identical_search_is_a_cache_hit(service):
+    with FakeOpenAI() as fake:
+        started = service(fake)
+        events = list(started.search_llm(QUERY))
+        assert 'local' in events[0]
+        assert [event['resource']['Resource_Name'] for event in events if 'resource' in event] == \
+            [resource['Resource_Name'] for resource in REPLY['resources']]
+        assert events[-1]['resources'] == REPLY['resources']
+        assert events[-1]['recommendation'] == REPLY['recommendation']
+
+        again = list(started.search_llm({**QUERY, 'needs': ' Dental '}))
+        assert again[-1]['resources'] == REPLY['resources']
+        assert len(fake.requests) == 1
+        assert started.cache.stats()['hits'] == 1
+
+
+def test_deadline_returns_local_results_and_the_call_still_fills_the_cache(service, monkeypatch):
+    monkeypatch.setattr(search_service, 'LLM_DEADLINE', 0.2)
+    with FakeOpenAI(chunk_size=10, delay=0.02) as fake:
+        started = service(fake)
+        events = list(started.search_llm(QUERY))
+        assert 'local' in events[0]
+        assert 'no response within' in events[-1]['error']
+
+        # The call keeps running in the background and caches its reply
+        waited = time.monotonic()
+        while started.cache.stats()['entries'] == 0 and time.monotonic() - waited < 10:
+            time.sleep(0.05)
+        assert started.cache.stats()['entries'] == 1
+        assert list(started.search_llm(QUERY))[-1]['resources'] == REPLY['resources']
+        assert len(fake.requests) == 1
@@ -0,0 +1,142 @@
+"""The vectorized matcher against the original row-by-row search loop.
+
+The loop is the original iterrows search with its fuzzy partial_ratio test
+on Services. Synonyms, typo corrections and semantic matching may add rows,
+so the matcher must return every row the loop returns, in the same order.
+"""
+import itertools
+import os
+
+import pandas as pd
+import pytest
+from fuzzywuzzy import fuzz
+
+from benchmark import synthetic_resources
+from conftest import ROOT
+from matcher import FUZZY_THRESHOLD, ResourceMatcher, search_resources
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pd.read_csv(os.path.join(ROOT, "resources.csv"))
+
+
+@pytest.fixture(scope="module")
+def matcher(df):
+    return ResourceMatcher(df)
+
+
+def _parts(df, column):
+    return sorted({part.strip() for value in df[column].dropna() for part in value.split(',') if part.strip()})
+
+
+def loop_search(rows, zip_code, needs, insurance, language, gender):
+    """The original search loop over list(df.iterrows())."""
+    results = []
+    for _, row in rows:
+        zip_match = str(row['ZIP_Code']).strip() == str(zip_code).strip()
+        needs_match = fuzz.partial_ratio(needs.lower(), row['Services'].lower()) > FUZZY_THRESHOLD
+        insurance_match = insurance.lower() in row['Eligibility'].lower() or 'all' in row['Eligibility'].lower()
+        language_match = language.lower() in row['Languages'].lower() or 'all' in row['Languages'].lower()
+        gender_match = gender.lower() in row['Gender'].lower() or 'all' in row['Gender'].lower()
+        if zip_match and needs_match and insurance_match and language_match and gender_match:
+            results.append(row)
+    return pd.DataFrame(results)
+
+
+def realistic_needs(df):
+    """Needs as patients type them: whole services, word prefixes, truncations and typos."""
+    needs = set(df['Services']) | set(_parts(df, 'Services'))
+    for part in _parts(df, 'Services'):
+        needs.add(part.upper())
+        part = part.lower()
+        needs.add(part[:-2])
+        for word in part.split():
+            needs.update(word[:size] for size in range(4, len(word)))
+            if len(word) > 4:
+                middle = len(word) // 2
+                needs.add(part.replace(word, word[:middle] + word[middle + 1:]))
+                needs.add(part.replace(word, word[:middle] + word[middle + 1] + word[middle] + word[middle + 2:]))
+                needs.add(part.replace(word, word[:middle] + word[middle] + word[middle:]))
+    return sorted(needs)
+
+
+def assert_contains_in_order(found, original, query):
+    """found holds every row of original, in the same relative order."""
+    found, original = list(found.index), list(original.index)
+    assert [row for row in found if row in set(original)] == original, query
+
+
+def test_search_finds_everything_the_original_loop_found(df, matcher):
+    """Partial, truncated and misspelled needs in every ZIP; empty filter values admit every row."""
+    rows = list(df.iterrows())
+    needs = realistic_needs(df)
+    assert {'prim', 'behav', 'scre', 'pedi', 'educ', 'immun'} <= set(needs)
+    for zip_code, need in itertools.product(df['ZIP_Code'].unique(), needs):
+        query = (zip_code, need, '', '', '')
+        assert_contains_in_order(search_resources(matcher, *query), loop_search(rows, *query), query)
+
+
+def test_filters_keep_original_matches(df, matcher):
+    """Every combination of the ZIP, whole Services and filter values in resources.csv."""
+    rows = list(df.iterrows())
+    checked = 0
+    for query in itertools.product(df['ZIP_Code'].unique(), df['Services'].unique(), _parts(df, 'Eligibility') + [''],
+                                   _parts(df, 'Languages'), _parts(df, 'Gender')):
+        assert_contains_in_order(search_resources(matcher, *query), loop_search(rows, *query), query)
+        checked += 1
+    assert checked > 1000
+
+
+def test_search_resources_accepts_dataframe(df, matcher):
+    args = (df['ZIP_Code'].iloc[0], 'primary care', 'Uninsured', 'English', 'All')
+    assert list(search_resources(df, *args).index) == list(matcher.search(*args).index)
+
+
+def test_partial_needs_find_what_the_original_loop_found(matcher):
+    assert list(matcher.search('78753', 'prim', 'Uninsured', 'English', 'All').index) == [19]
+
+
+@pytest.fixture(scope="module")
+def synthetic():
+    """A synthetic dataset where many matches tie on score, and a ZIP with many resources."""
+    df = synthetic_resources(3000, seed=1)
+    return ResourceMatcher(df), df['ZIP_Code'].value_counts().index[0]
+
+
+@pytest.mark.parametrize('area', [{}, {'radius_miles': 5}, {'k': 40}])
+def test_ranked_pages_follow_the_full_ranking(synthetic, area):
+    matcher, zip_code = synthetic
+    args = (zip_code, 'primary care', '', '', '')
+    full, total = matcher.ranked(*args, **area)
+    assert total == len(full) > 30
+    assert list(full['Score']) == sorted(full['Score'], reverse=True)
+    assert full['Score'].duplicated().any()
+    for limit in (1, 7, 10):
+        pages = []
+        for offset in range(0, total, limit):
+            page, page_total = matcher.ranked(*args, **area, limit=limit, offset=offset)
+            assert page_total == total and len(page) == min(limit, total - offset)
+            pages.append(page)
+        # Pages neither overlap nor skip rows, including rows tied at a page's cutoff
+        assert list(pd.concat(pages).index) == list(full.index)
+
+
+def test_ranked_ties_keep_match_order(synthetic):
+    matcher, zip_code = synthetic
+    full, _ = matcher.ranked(zip_code, 'primary care', '', '', '', radius_miles=5)
+    for _, tied in full.groupby('Score', sort=False):
+        assert list(tied['Distance_Miles']) == sorted(tied['Distance_Miles'])
+    plain, _ = matcher.ranked(zip_code, 'primary care', '', '', '')
+    for _, tied in plain.groupby('Score', sort=False):
+        assert list(tied.index) == sorted(tied.index)
+
+
+def test_ranked_offset_past_the_end(synthetic):
+    matcher, zip_code = synthetic
+    _, total = matcher.ranked(zip_code, 'primary care', '', '', '')
+    for offset in (total, total + 5):
+        page, page_total = matcher.ranked(zip_code, 'primary care', '', '', '', limit=10, offset=offset)
+        assert page.empty and page_total == total
+    page, page_total = matcher.ranked(zip_code, 'no such service xyzzy', '', '', '', limit=10)
+    assert page.empty and page_total == 0
@@ -0,0 +1,61 @@
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from prompting import PROMPT_COLUMNS, PROMPT_TEMPLATE, build_prompt, estimate_tokens, serialize_row
+
+FIELDS = ('78701', 'dental', 'Uninsured', 'English', 'All')
+
+
+@pytest.fixture(scope="module")
+def candidates():
+    """resources.csv repeated to more rows than any budget below fits, in rank order."""
+    df = pd.read_csv(os.path.join(ROOT, "resources.csv"), dtype=str)
+    df = pd.concat([df] * 10, ignore_index=True)
+    return df.assign(Resource_Name=[f"{name} #{rank}" for rank, name in enumerate(df['Resource_Name'])])
+
+
+def _prompt_rows(prompt):
+    header = '|'.join(PROMPT_COLUMNS)
+    return [line for line in prompt.splitlines() if line.count('|') == len(PROMPT_COLUMNS) - 1 and line != header]
+
+
+def _template_tokens():
+    return estimate_tokens(PROMPT_TEMPLATE.format(resources='|'.join(PROMPT_COLUMNS), zip_code=FIELDS[0], needs=FIELDS[1],
+                                                  insurance=FIELDS[2], language=FIELDS[3], gender=FIELDS[4]))
+
+
+@pytest.mark.parametrize('extra', [0, 1, 30, 100, 500, 1000, 3000])
+def test_prompt_stays_within_the_budget_and_keeps_the_best_rows(candidates, extra):
+    budget = _template_tokens() + extra
+    prompt, rows, tokens = build_prompt(candidates, *FIELDS, token_budget=budget)
+    assert tokens == estimate_tokens(prompt) <= budget
+    assert rows < len(candidates)
+    # Rows are dropped from the worst end: the prompt holds the first `rows` candidates, in rank order
+    assert _prompt_rows(prompt) == [serialize_row(row) for _, row in candidates.head(rows).iterrows()]
+    # The next candidate would not have fit
+    with_next = build_prompt(candidates.head(rows + 1), *FIELDS, token_budget=10 ** 6)[0]
+    assert estimate_tokens(with_next) > budget
+
+
+def test_everything_fits_a_large_budget(candidates):
+    prompt, rows, tokens = build_prompt(candidates.head(5), *FIELDS, token_budget=100_000)
+    assert rows == 5 and len(_prompt_rows(prompt)) == 5
+
+
+def test_a_long_row_stops_the_prompt_rather_than_being_skipped(candidates):
+    ranked = candidates.head(6).copy()
+    ranked.loc[2, 'Services'] = 'dental care, ' * 400
+    prompt, rows, tokens = build_prompt(ranked, *FIELDS, token_budget=_template_tokens() + 500)
+    assert rows == 2
+    assert _prompt_rows(prompt) == [serialize_row(row) for _, row in ranked.head(2).iterrows()]
+
+
+def test_serialize_row_keeps_one_line_and_the_separator():
+    row = dict.fromkeys(PROMPT_COLUMNS, 'x')
+    row.update(Services='Dental | vision\nprimary care', Contact=None)
+    line = serialize_row(row)
+    assert '\n' not in line and line.count('|') == len(PROMPT_COLUMNS) - 1
+    assert 'Dental / vision primary care' in line
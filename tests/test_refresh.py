@@ -0,0 +1,93 @@
+"""generate_data() end to end against the saved source pages in fixtures/, served over local HTTP."""
+import functools
+import json
+import os
+import shutil
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from refresh import load_state
+
+# A listing whose phone is removed from the served page
+NO_PHONE_NAME = "Neighborhood Northside Free Clinic"
+NO_PHONE = '<span class="phone">512-946-3362</span>'
+
+
+class _FixtureHandler(SimpleHTTPRequestHandler):
+    def log_request(self, code='-', size='-'):
+        self.server.statuses.append((self.path, int(code)))
+
+
+@pytest.fixture
+def fixture_server(tmp_path):
+    pages = tmp_path / "pages"
+    shutil.copytree(os.path.join(ROOT, "fixtures"), pages)
+    page = pages / "centralhealth.net.html"
+    page.write_text(page.read_text(encoding='utf-8').replace(NO_PHONE, ''), encoding='utf-8')
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_FixtureHandler, directory=str(pages)))
+    server.statuses = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, pages
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def generate(tmp_path, monkeypatch, fixture_server):
+    """Run generate_data() in an empty working directory against the fixture server."""
+    monkeypatch.chdir(tmp_path)
+    import generate_data
+    from scrapers import SOURCES
+    server, _ = fixture_server
+    for source in SOURCES.values():
+        monkeypatch.setattr(source, 'min_interval', 0.0)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = {name: f"{base}/{name}.html" for name in SOURCES}
+    monkeypatch.setattr(generate_data, 'setup_selenium', lambda: None)
+    return lambda: generate_data.generate_data(urls=urls)
+
+
+def _changes(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_refresh_parses_fixtures_then_skips_unchanged_pages(generate, fixture_server, tmp_path):
+    server, pages = fixture_server
+    df = generate()
+    assert load_state("resources.state.json")['revision'] == 1
+    names = set(pd.read_csv("resources.csv")['Resource_Name'])
+    assert NO_PHONE_NAME in names and names == set(df['Resource_Name'])
+    assert {status for _, status in server.statuses} == {200}
+    added = _changes("resources.changes.jsonl")
+    assert added and {change['change'] for change in added} == {'added'}
+    no_phone = [resource for resource in json.load(open("resources.json", encoding='utf-8'))
+                if resource['Resource_Name'] == NO_PHONE_NAME]
+    assert no_phone[0]['Contact'] is None
+
+    # Second run: every page answers 304 Not Modified and nothing is rewritten
+    server.statuses.clear()
+    written = os.path.getmtime("resources.csv")
+    generate()
+    assert {status for _, status in server.statuses} == {304}
+    assert load_state("resources.state.json")['revision'] == 1
+    assert os.path.getmtime("resources.csv") == written
+    assert len(_changes("resources.changes.jsonl")) == len(added)
+
+    # A page edit that leaves the listings alone is parsed again but changes no record,
+    # including the listing without a phone
+    for page in pages.iterdir():
+        page.write_text(page.read_text(encoding='utf-8') + "<!-- refreshed -->", encoding='utf-8')
+        os.utime(page, (time.time() + 10, time.time() + 10))
+    server.statuses.clear()
+    generate()
+    assert {status for _, status in server.statuses} == {200}
+    assert load_state("resources.state.json")['revision'] == 1
+    assert len(_changes("resources.changes.jsonl")) == len(added)
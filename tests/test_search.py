@@ -0,0 +1,25 @@
+import pytest
+
+from search import parse_query
+
+QUERY = {'zip_code': '78756', 'needs': 'primary care'}
+
+
+def test_parse_query_defaults():
+    parsed = parse_query(QUERY)
+    assert parsed['insurance'] == '' and parsed['k'] is None and parsed['radius_miles'] is None
+    assert parsed['offset'] == 0 and parsed['open_during'] is None
+
+
+def test_parse_query_reads_csv_text():
+    parsed = parse_query({**QUERY, 'k': '5', 'radius_miles': '2.5', 'limit': '10', 'open_day': 'thu', 'open_after': '6PM'})
+    assert (parsed['k'], parsed['radius_miles'], parsed['limit']) == (5, 2.5, 10)
+    assert parsed['open_during'] == (3 * 1440 + 18 * 60, 4 * 1440)
+
+
+@pytest.mark.parametrize('fields', [{'k': 0}, {'k': '-2'}, {'radius_miles': -1}, {'radius_miles': 'nan'},
+                                    {'limit': 0}, {'offset': -1}, {'radius_miles': 'far'},
+                                    {'open_day': 'funday'}, {'open_after': '6PM'}])
+def test_parse_query_rejects_bad_values(fields):
+    with pytest.raises(ValueError):
+        parse_query({**QUERY, **fields})
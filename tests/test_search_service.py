@@ -0,0 +1,127 @@
+"""Dataset reloading, the worker pool and the HTTP handler of the search service."""
+import json
+import os
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+import search_service
+import tracing
+from conftest import ROOT
+from search import Dataset
+
+QUERY = {'zip_code': '78753', 'needs': 'primary care', 'insurance': 'Uninsured', 'language': 'English', 'gender': 'All'}
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "resources.csv"
+    shutil.copy(os.path.join(ROOT, "resources.csv"), path)
+    return str(path)
+
+
+def _rewrite(csv_path, df):
+    """Replace the CSV with a new version, as generate_data.py does, with a newer modification time."""
+    df.to_csv(csv_path + ".tmp", index=False)
+    os.replace(csv_path + ".tmp", csv_path)
+    later = time.time() + 10
+    os.utime(csv_path, (later, later))
+
+
+def test_dataset_reloads_a_new_version_and_keeps_the_old_on_failure(csv_path):
+    dataset = Dataset(csv_path, reload_interval=0)
+    first = dataset.matcher()
+    assert dataset.matcher() is first
+
+    df = pd.read_csv(csv_path)
+    _rewrite(csv_path, df.iloc[:5])
+    second = dataset.matcher()
+    assert len(second) == 5 and second.version != first.version
+
+    os.remove(csv_path)
+    assert dataset.matcher() is second
+
+
+def test_dataset_checks_for_new_versions_at_most_every_interval(csv_path):
+    dataset = Dataset(csv_path, reload_interval=60)
+    first = dataset.matcher()
+    _rewrite(csv_path, pd.read_csv(csv_path).iloc[:5])
+    assert dataset.matcher() is first
+
+
+def test_workers_record_their_load_and_pick_up_a_rewritten_csv(csv_path, monkeypatch):
+    # Spawned workers read the interval from the environment
+    monkeypatch.setenv('DATASET_RELOAD_INTERVAL', '0')
+    loads = tracing.histogram('data_load').count
+    service = search_service.SearchService(csv_path=csv_path, workers=2)
+    try:
+        assert tracing.histogram('data_load').count == loads + 2
+        assert 'stage="data_load"' in tracing.metrics_text()
+        before = service.search(QUERY)
+        assert before['count'] == 1
+
+        df = pd.read_csv(csv_path)
+        _rewrite(csv_path, df[df['ZIP_Code'] != 78753])
+        # Whichever worker serves the search checks for a new version first
+        after = service.search(QUERY)
+        assert after['count'] == 0 and after['version'] != before['version']
+        assert service.stats()['rows'] == len(df) - 1
+    finally:
+        service.close()
+
+
+@pytest.fixture(scope="module")
+def server():
+    service = search_service.SearchService(csv_path=os.path.join(ROOT, "resources.csv"), workers=1)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), search_service.SearchHandler)
+    httpd.service = service
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+    service.close()
+
+
+def _request(url, body=None):
+    """(status, decoded JSON body) of a GET, or of a POST when body (bytes) is given."""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=body), timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_search_endpoint(server):
+    status, body = _request(f"{server}/search", json.dumps(QUERY).encode('utf-8'))
+    assert status == 200
+    assert body['count'] == 1 and body['results'][0]['Resource_Name'] == "Goodwill Health Services"
+    assert _request(f"{server}/health") == (200, {'status': 'ok'})
+    status, stats = _request(f"{server}/stats")
+    assert status == 200 and stats['version'] == body['version']
+
+
+@pytest.mark.parametrize('path', ['/search', '/search/llm'])
+@pytest.mark.parametrize('body', [
+    json.dumps({**QUERY, 'k': 0}),
+    json.dumps({**QUERY, 'k': 'five'}),
+    json.dumps([QUERY]),
+    '"78753"',
+    '{"zip_code": ',
+    json.dumps({**QUERY, 'open_day': 'Monday', 'open_after': 'late'}),
+    json.dumps({**QUERY, 'open_day': 'someday'}),
+])
+def test_bad_queries_get_400(server, path, body):
+    status, reply = _request(f"{server}{path}", body.encode('utf-8'))
+    assert status == 400
+    assert reply['error'].startswith("Invalid query")
+
+
+def test_unknown_paths_get_404(server):
+    assert _request(f"{server}/nope")[0] == 404
+    assert _request(f"{server}/nope", b'{}')[0] == 404
@@ -0,0 +1,20 @@
+import numpy as np
+
+from service_index import ServiceIndex, normalize_text
+
+
+def test_normalize_text_keeps_accented_letters():
+    assert normalize_text("Niños, Women’s health") == "ninos, womens health"
+    assert normalize_text("Salud  mental/psiquiatría") == "salud mental psiquiatria"
+
+
+def test_accented_needs_find_unaccented_services():
+    index = ServiceIndex.build(np.array([0, 1]), ["Salud de ninos, dental", "Primary care"])
+    terms, _ = index.expand("salud de niños")
+    assert list(index.lookup(terms)) == [0]
+
+
+def test_misspelled_words_become_fuzzy_variants():
+    index = ServiceIndex.build(np.array([0, 1]), ["Dental care", "Primary care"])
+    terms, variants = index.expand("dentl")
+    assert 'dental' in terms and variants == ['dentl', 'dental']
@@ -0,0 +1,46 @@
+import os
+import shutil
+
+import pandas as pd
+
+from conftest import ROOT
+from matcher import ResourceMatcher
+from refresh import load_resources, load_state, save_state, state_path_for
+from snapshot import open_matcher, read_snapshot, snapshot_path_for, write_snapshot
+
+CSV_PATH = os.path.join(ROOT, "resources.csv")
+
+
+def test_dataset_version_does_not_depend_on_load_path(tmp_path):
+    # generate_data.py builds the snapshot from string ZIPs; the CSV reads them back as integers
+    generated = ResourceMatcher(pd.DataFrame(load_resources(CSV_PATH)))
+    from_csv = ResourceMatcher(pd.read_csv(CSV_PATH))
+    write_snapshot(generated, str(tmp_path / "resources.snapshot"))
+    from_snapshot = read_snapshot(str(tmp_path / "resources.snapshot"))
+    assert generated.version == from_csv.version == from_snapshot.version
+
+
+def test_snapshot_search_matches_csv(tmp_path):
+    from_csv = ResourceMatcher(pd.read_csv(CSV_PATH))
+    write_snapshot(from_csv, str(tmp_path / "resources.snapshot"))
+    from_snapshot = read_snapshot(str(tmp_path / "resources.snapshot"))
+    for needs in ('primary care', 'dentist', 'womens clinic', 'counseling'):
+        csv_page, csv_total = from_csv.ranked('78702', needs, 'Uninsured', '', '', radius_miles=10)
+        snapshot_page, snapshot_total = from_snapshot.ranked('78702', needs, 'Uninsured', '', '', radius_miles=10)
+        assert csv_total == snapshot_total
+        assert list(csv_page['Resource_Name']) == list(snapshot_page['Resource_Name'])
+
+
+def test_dataset_version_carries_the_refresh_revision(tmp_path):
+    csv_path = str(tmp_path / "resources.csv")
+    shutil.copy(CSV_PATH, csv_path)
+    assert open_matcher(csv_path).revision is None
+
+    state = load_state(state_path_for(csv_path))
+    state['revision'] = 7
+    save_state(state, state_path_for(csv_path))
+    from_csv = open_matcher(csv_path)
+    write_snapshot(from_csv, snapshot_path_for(csv_path))
+    from_snapshot = open_matcher(csv_path)
+    assert from_csv.revision == from_snapshot.revision == 7
+    assert from_csv.version == from_snapshot.version == f"r7-{from_csv.fingerprint}"
@@ -0,0 +1,97 @@
+import atexit
+import json
+import re
+import uuid
+
+import pytest
+
+import tracing
+from tracing import BUCKETS, METRIC_NAME, collect, event, histogram, metrics_text, replay, span, trace
+
+
+@pytest.fixture
+def trace_log(tmp_path, monkeypatch):
+    """Start a background writer to a temporary file; returns a function that stops it and reads the JSON lines."""
+    monkeypatch.setattr(tracing, '_listener', None)
+    monkeypatch.setattr(tracing, '_records', None)
+    path = tmp_path / "trace.jsonl"
+    tracing.configure(str(path))
+    listener = tracing._listener
+
+    def read():
+        listener.stop()
+        atexit.unregister(listener.stop)
+        for handler in listener.handlers:
+            handler.close()
+        return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    return read
+
+
+def _stage(name):
+    # Histograms are per process; unique stage names keep other tests' spans out
+    return f"{name}_{uuid.uuid4().hex[:8]}"
+
+
+def _buckets(text, stage):
+    pattern = rf'{METRIC_NAME}_bucket\{{stage="{stage}",le="([^"]+)"\}} (\d+)'
+    return [(bound, int(count)) for bound, count in re.findall(pattern, text)]
+
+
+def test_spans_are_logged_as_json_lines_and_counted_in_histograms(trace_log):
+    root, child, failing = _stage("search"), _stage("filter"), _stage("parse")
+    with trace(root, mode="fuzzy"):
+        with span(child, rows=3) as fields:
+            fields['kept'] = 2
+        with pytest.raises(ValueError):
+            with span(failing):
+                raise ValueError("bad reply")
+        event("llm_error", error="bad reply")
+    lines = trace_log()
+
+    spans = {line['span']: line for line in lines if 'span' in line}
+    assert spans[root]['parent'] is None and spans[root]['mode'] == "fuzzy"
+    assert spans[child]['parent'] == root and (spans[child]['rows'], spans[child]['kept']) == (3, 2)
+    assert spans[failing]['error'] == "ValueError"
+    trace_id = spans[root]['trace_id']
+    assert trace_id and {line['trace_id'] for line in lines} == {trace_id}
+    assert [line for line in lines if line.get('event') == "llm_error"][0]['error'] == "bad reply"
+    assert all(line['duration_ms'] >= 0 and 'time' in line for line in spans.values())
+    # A child finishes, and is written, before its parent
+    assert [line['span'] for line in lines if 'span' in line] == [child, failing, root]
+
+    text = metrics_text()
+    assert f'# TYPE {METRIC_NAME} histogram' in text
+    for stage in (root, child, failing):
+        buckets = _buckets(text, stage)
+        assert [bound for bound, _ in buckets] == [str(bound) for bound in BUCKETS] + ['+Inf']
+        counts = [count for _, count in buckets]
+        assert counts == sorted(counts) and counts[-1] == 1
+        assert f'{METRIC_NAME}_count{{stage="{stage}"}} 1' in text
+
+
+def test_histogram_buckets_and_quantiles():
+    stage = _stage("fuzzy_score")
+    for seconds in (0.0002, 0.0002, 0.003, 0.2):
+        histogram(stage).observe(seconds)
+    counts = dict(_buckets(metrics_text(), stage))
+    assert (counts['0.0001'], counts['0.00025'], counts['0.0025'], counts['0.005'], counts['0.25'], counts['+Inf']) == \
+        (0, 2, 2, 3, 4, 4)
+    assert f'{METRIC_NAME}_sum{{stage="{stage}"}} 0.203400' in metrics_text()
+    assert 0.0001 <= histogram(stage).quantile(0.5) <= 0.00025
+    assert histogram(stage).quantile(0.95) == pytest.approx(0.1 + 0.15 * 0.8)
+    assert tracing.stage_summary()[stage]['count'] == 4
+
+
+def test_collected_spans_are_replayed_under_the_current_trace(trace_log):
+    root, worker = _stage("search"), _stage("data_load")
+    with collect() as spans:
+        with span(worker, rows=20):
+            pass
+    assert histogram(worker).count == 0 and len(spans) == 1
+    with trace(root):
+        replay(spans)
+    lines = trace_log()
+    replayed = [line for line in lines if line['span'] == worker][0]
+    assert replayed['parent'] == root and replayed['rows'] == 20
+    assert replayed['trace_id'] == [line for line in lines if line['span'] == root][0]['trace_id']
+    assert histogram(worker).count == 1
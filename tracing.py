@@ -0,0 +1,222 @@
+"""Per-stage latency spans, histograms and non-blocking structured logging.
+
+    with trace("search", mode="fuzzy"):
+        with span("filter"):
+            ...
+
+Each span's duration is added to an in-process histogram for its stage and
+emitted as a JSON line, tagged with the trace it belongs to. The request
+path only appends a dict to a queue; a background QueueListener thread
+turns it into a log record and writes it to a rotating file, so requests
+never wait on formatting or disk. metrics_text() renders the
+histograms in the Prometheus text exposition format.
+
+Work done in another process (e.g. a search worker) runs inside collect(),
+which gathers its spans instead, and replay() records them in the
+requesting process under its current trace.
+
+The log location is read from TRACE_LOG_PATH (default trace.jsonl),
+rotated at TRACE_LOG_MAX_BYTES with TRACE_LOG_BACKUPS old files kept.
+"""
+import atexit
+import bisect
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "trace.jsonl")
+TRACE_LOG_MAX_BYTES = int(os.getenv("TRACE_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_LOG_BACKUPS = int(os.getenv("TRACE_LOG_BACKUPS", "5"))
+
+# Upper bounds in seconds, as in the Prometheus client defaults plus sub-millisecond buckets
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_NAME = 'navigator_stage_duration_seconds'
+
+_trace_id = contextvars.ContextVar('trace_id', default=None)
+_span_path = contextvars.ContextVar('span_path', default=())
+_collected = contextvars.ContextVar('collected', default=None)
+
+_records = None
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, safe to update from several threads."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket, like histogram_quantile()."""
+        with self._lock:
+            counts, count = list(self.counts), self.count
+        if count == 0:
+            return None
+        rank = q * count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def histogram(stage):
+    """The histogram for a stage, created on first use."""
+    found = _histograms.get(stage)
+    if found is None:
+        with _histograms_lock:
+            found = _histograms.setdefault(stage, Histogram())
+    return found
+
+
+class _Listener(logging.handlers.QueueListener):
+    def prepare(self, item):
+        # Queue items are (timestamp, fields); the log record is built off the request path
+        created, fields = item
+        return logging.makeLogRecord({'name': 'tracing', 'levelno': logging.INFO, 'levelname': 'INFO',
+                                      'msg': fields, 'created': created})
+
+
+class _JSONFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps({'time': round(record.created, 6), **record.msg}, default=str)
+
+
+def configure(path=TRACE_LOG_PATH, max_bytes=TRACE_LOG_MAX_BYTES, backups=TRACE_LOG_BACKUPS):
+    """Start the background writer (once per process); later calls are no-ops."""
+    global _listener, _records
+    with _setup_lock:
+        if _listener is not None:
+            return
+        file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        file_handler.setFormatter(_JSONFormatter())
+        records = queue.SimpleQueue()
+        _listener = _Listener(records, file_handler)
+        _listener.start()
+        atexit.register(_listener.stop)
+        _records = records
+
+
+def _emit(fields):
+    if _records is not None:
+        _records.put((time.time(), fields))
+
+
+def event(name, **fields):
+    """Write a structured event to the trace log, tagged with the current trace."""
+    _emit({'event': name, 'trace_id': _trace_id.get(), **fields})
+
+
+@contextmanager
+def span(stage, **attributes):
+    """Time a stage, record it in the stage's histogram and log it.
+
+    Yields a dict that the block can add attributes to (e.g. result counts).
+    """
+    path = _span_path.get()
+    token = _span_path.set(path + (stage,))
+    attributes = dict(attributes)
+    error = None
+    start = time.perf_counter()
+    try:
+        yield attributes
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _span_path.reset(token)
+        fields = {'span': stage, 'trace_id': _trace_id.get(), 'parent': path[-1] if path else None,
+                  'duration_ms': round(1000 * elapsed, 3), 'error': error, **attributes}
+        collected = _collected.get()
+        if collected is not None:
+            collected.append((elapsed, fields))
+        else:
+            histogram(stage).observe(elapsed)
+            _emit(fields)
+
+
+@contextmanager
+def trace(name, **attributes):
+    """Start a new trace (e.g. one search request) whose root span is name."""
+    token = _trace_id.set(uuid.uuid4().hex[:16])
+    try:
+        with span(name, **attributes) as fields:
+            yield fields
+    finally:
+        _trace_id.reset(token)
+
+
+@contextmanager
+def collect():
+    """Gather the spans finished in the block into the yielded list instead of recording them."""
+    collected = []
+    token = _collected.set(collected)
+    try:
+        yield collected
+    finally:
+        _collected.reset(token)
+
+
+def replay(collected):
+    """Record spans gathered by collect() (possibly in another process) under the current trace."""
+    path = _span_path.get()
+    for elapsed, fields in collected:
+        histogram(fields['span']).observe(elapsed)
+        _emit({**fields, 'trace_id': _trace_id.get(), 'parent': fields['parent'] or (path[-1] if path else None)})
+
+
+def stage_summary():
+    """{stage: {count, mean_ms, p50_ms, p95_ms}} for every recorded stage."""
+    summary = {}
+    for stage, hist in sorted(_histograms.items()):
+        if hist.count:
+            summary[stage] = {
+                'count': hist.count,
+                'mean_ms': round(1000 * hist.sum / hist.count, 3),
+                'p50_ms': round(1000 * hist.quantile(0.5), 3),
+                'p95_ms': round(1000 * hist.quantile(0.95), 3),
+            }
+    return summary
+
+
+def metrics_text():
+    """Stage histograms in the Prometheus text exposition format."""
+    lines = [f'# HELP {METRIC_NAME} Time spent in each search stage.', f'# TYPE {METRIC_NAME} histogram']
+    for stage, hist in sorted(_histograms.items()):
+        with hist._lock:
+            counts, total, count = list(hist.counts), hist.sum, hist.count
+        cumulative = 0
+        for bound, bucket_count in zip(list(hist.buckets) + ['+Inf'], counts):
+            cumulative += bucket_count
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {total:.6f}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {count}')
+    return '\n'.join(lines) + '\n'